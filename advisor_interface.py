@@ -1,7 +1,7 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QTableWidget,
     QTableWidgetItem, QMessageBox, QHBoxLayout, QTabWidget, QHeaderView,
-    QFrame, QSizePolicy
+    QFrame, QSizePolicy, QInputDialog
 )
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QIcon
@@ -520,14 +520,10 @@ class AdvisorDashboard(QWidget):
     def reset_all_data(self):
         """Réinitialisation de toutes les données"""
         try:
-            # Supprimer tous les étudiants
-            self.db.cursor.execute("DELETE FROM students")
-            
-            # Supprimer toutes les classes
-            self.db.cursor.execute("DELETE FROM classes")
-            
-            # Valider les changements
-            self.db.conn.commit()
+            # Supprimer tous les étudiants et toutes les classes (une seule transaction)
+            with self.db.cursor() as cursor:
+                cursor.execute("DELETE FROM students")
+                cursor.execute("DELETE FROM classes")
             
             # Recharger les données
             self.load_data()
@@ -658,9 +654,11 @@ class AdvisorDashboard(QWidget):
             name_filter = self.name_filter.text().strip()
             
             query = '''
-                SELECT s.student_id, s.full_name, s.class, c.class_code
+                SELECT s.student_id, s.full_name, s.class, c.class_code,
+                       l.domaine, l.confidence, l.response_id
                 FROM students s
                 LEFT JOIN classes c ON s.class = c.class_name
+                LEFT JOIN student_latest_response l ON s.student_id = l.student_id
                 WHERE 1=1
             '''
             params = []
@@ -673,7 +671,8 @@ class AdvisorDashboard(QWidget):
                 query += " AND s.full_name LIKE ?"
                 params.append(f"%{name_filter}%")
             
-            students = self.db.cursor.execute(query, params).fetchall()
+            with self.db.cursor() as cursor:
+                students = cursor.execute(query, params).fetchall()
             self.populate_student_table(students)
         except Exception as e:
             self.update_status(f"Erreur de chargement des étudiants: {str(e)}")
@@ -683,26 +682,22 @@ class AdvisorDashboard(QWidget):
         """Met à jour les statistiques et les graphiques"""
         try:
             # Nombre total d'étudiants
-            total_students = self.db.cursor.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+            with self.db.cursor() as cursor:
+                total_students = cursor.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+                total_classes = cursor.execute("SELECT COUNT(*) FROM classes").fetchone()[0]
+                total_responses = cursor.execute("SELECT COUNT(*) FROM student_responses").fetchone()[0]
             self.total_students_card.layout().itemAt(1).widget().setText(str(total_students))
             
             # Nombre total de classes
-            total_classes = self.db.cursor.execute("SELECT COUNT(*) FROM classes").fetchone()[0]
             self.classes_card.layout().itemAt(1).widget().setText(str(total_classes))
             
-            # Domaines uniques + collecte pour graphique
-            domaines = []
-            students = self.db.cursor.execute("SELECT student_id FROM students").fetchall()
-            for (student_id,) in students:
-                last_response = self.db.get_last_response(student_id)
-                if last_response and "domaine" in last_response:
-                    domaines.append(last_response["domaine"])
+            # Répartition des domaines (agrégée en SQL) pour la carte et le graphique
+            distribution = self.db.get_domain_distribution()
             
-            unique_domains = len(set(domaines))
+            unique_domains = len(distribution)
             self.domains_card.layout().itemAt(1).widget().setText(str(unique_domains))
             
             # Nombre total de réponses (corrigé → student_responses)
-            total_responses = self.db.cursor.execute("SELECT COUNT(*) FROM student_responses").fetchone()[0]
             self.responses_card.layout().itemAt(1).widget().setText(str(total_responses))
             
             # Dernière mise à jour
@@ -711,7 +706,7 @@ class AdvisorDashboard(QWidget):
             self.last_update_card.layout().itemAt(1).widget().setText(now)
             
             # Mettre à jour le graphique avec les domaines
-            self.plot_stats(domaines)
+            self.plot_stats(distribution)
         
         except Exception as e:
             logging.error(f"Erreur de mise à jour des stats: {str(e)}")
@@ -732,21 +727,11 @@ class AdvisorDashboard(QWidget):
         """Remplit le tableau des étudiants"""
         self.student_table.setRowCount(len(students))
         
-        for row_idx, (student_id, full_name, class_name, class_code) in enumerate(students):
-            last_response = self.db.get_last_response(student_id)
-            
-            domaine = last_response.get("domaine", "Pas de réponse") if last_response else "Pas de réponse"
+        for row_idx, (student_id, full_name, class_name, class_code, domaine, confidence, response_id) in enumerate(students):
+            domaine = domaine or "Pas de réponse"
             
-            # Gestion de la valeur de confiance avec 2 décimales
-            confidence = 0
-            if last_response and "confidence" in last_response:
-                try:
-                    confidence = float(last_response["confidence"])
-                    confidence = f"{confidence:.2f}%"  # Format à 2 décimales
-                except (ValueError, TypeError):
-                    confidence = "0.00%"
-            else:
-                confidence = "0.00%"
+            # Confiance avec 2 décimales
+            confidence = f"{confidence or 0:.2f}%"
             
             # Création des éléments avec style approprié
             self.student_table.setItem(row_idx, 0, self.create_table_item(student_id))
@@ -790,9 +775,32 @@ class AdvisorDashboard(QWidget):
             """)
             delete_btn.clicked.connect(lambda _, sid=student_id: self.delete_student(sid))
             
-            # Widget pour le bouton
+            # Bouton de validation du domaine (libellé pour l'affinage incrémental)
+            validate_btn = QPushButton("Valider")
+            validate_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #27ae60;
+                    color: white;
+                    border: none;
+                    padding: 5px;
+                    border-radius: 4px;
+                }
+                QPushButton:hover {
+                    background-color: #1e8449;
+                }
+                QPushButton:disabled {
+                    background-color: #bdc3c7;
+                }
+            """)
+            validate_btn.setEnabled(response_id is not None)
+            validate_btn.clicked.connect(
+                lambda _, sid=student_id, rid=response_id, dom=domaine: self.validate_domain(sid, rid, dom)
+            )
+            
+            # Widget pour les boutons
             btn_widget = QWidget()
             btn_layout = QHBoxLayout(btn_widget)
+            btn_layout.addWidget(validate_btn)
             btn_layout.addWidget(delete_btn)
             btn_layout.setAlignment(Qt.AlignCenter)
             btn_layout.setContentsMargins(0, 0, 0, 0)
@@ -813,8 +821,8 @@ class AdvisorDashboard(QWidget):
             
             if reply == QMessageBox.Yes:
                 # Suppression
-                self.db.cursor.execute("DELETE FROM students WHERE student_id = ?", (student_id,))
-                self.db.conn.commit()
+                with self.db.cursor() as cursor:
+                    cursor.execute("DELETE FROM students WHERE student_id = ?", (student_id,))
                 
                 # Rechargement
                 self.load_students_data()
@@ -825,27 +833,42 @@ class AdvisorDashboard(QWidget):
             self.show_message("Erreur", f"Échec de la suppression: {str(e)}", QMessageBox.Critical)
             logging.error(f"Erreur de suppression: {str(e)}")
 
-    def plot_stats(self):
+    def validate_domain(self, student_id, response_id, domaine):
+        """Enregistre le domaine confirmé par le conseiller pour la dernière réponse de l'étudiant"""
+        try:
+            # Domaines déjà prédits; le conseiller peut aussi en saisir un autre
+            domaines = [name for name, _ in self.db.get_domain_distribution(latest_only=False)]
+            current = domaines.index(domaine) if domaine in domaines else 0
+            choice, ok = QInputDialog.getItem(
+                self,
+                'Valider le Domaine',
+                f'Domaine confirmé pour l\'étudiant {student_id}:',
+                domaines, current, True
+            )
+            choice = choice.strip()
+            if not ok or not choice:
+                return
+            
+            if self.db.set_validated_domain(response_id, choice):
+                self.show_message("Succès", f"Domaine « {choice} » validé pour {student_id}.", QMessageBox.Information)
+            else:
+                self.show_message("Erreur", "La réponse n'existe plus.", QMessageBox.Warning)
+        except Exception as e:
+            self.show_message("Erreur", f"Échec de la validation: {str(e)}", QMessageBox.Critical)
+            logging.error(f"Erreur de validation: {str(e)}")
+
+    def plot_stats(self, distribution=None):
         """Dessine les statistiques sous forme de graphique"""
         self.figure.clear()
         ax = self.figure.add_subplot(111)
         
         # Exemple : Répartition par domaines
-        domaines = []
-        counts = []
-        
         try:
-            students = self.db.cursor.execute("SELECT student_id FROM students").fetchall()
-            for (student_id,) in students:
-                last_response = self.db.get_last_response(student_id)
-                if last_response and "domaine" in last_response:
-                    domaines.append(last_response["domaine"])
+            if distribution is None:
+                distribution = self.db.get_domain_distribution()
             
-            # Compter les occurrences par domaine
-            from collections import Counter
-            counter = Counter(domaines)
-            counts = list(counter.values())
-            labels = list(counter.keys())
+            labels = [domaine for domaine, _ in distribution]
+            counts = [count for _, count in distribution]
             
             if counts:
                 ax.pie(counts, labels=labels, autopct='%1.1f%%', startangle=140)
@@ -0,0 +1,141 @@
+import json
+import hashlib
+from questions import QUESTIONS
+from preprocessing import CHECKBOX_SEPARATOR
+
+# First byte of every blob: layout of the entries below (bump if it changes)
+CODEC_FORMAT = 1
+
+# Entry kinds, in the low 2 bits of each entry header (the question index is in the others)
+_OPTION = 0    # one option index
+_OPTIONS = 1   # several option indices, joined with CHECKBOX_SEPARATOR
+_TEXT = 2      # free text: text questions, or answers that are not options
+_EXTRA = 3     # key that is not a question text, value kept as JSON
+
+def questionnaire_schema(questions=QUESTIONS):
+    """Ordered [question id, text, type, options] entries that identify a questionnaire"""
+    return [
+        [q_id, q_data["text"], q_data["type"], list(q_data.get("options", []))]
+        for q_id, q_data in questions.items()
+    ]
+
+def schema_fingerprint(schema):
+    """Stable digest of a questionnaire schema"""
+    return hashlib.sha256(json.dumps(schema, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(blob, pos):
+    value, shift = 0, 0
+    while True:
+        byte = blob[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _write_str(out, text):
+    data = text.encode("utf-8")
+    _write_varint(out, len(data))
+    out += data
+
+def _read_str(blob, pos):
+    length, pos = _read_varint(blob, pos)
+    return bytes(blob[pos:pos + length]).decode("utf-8"), pos + length
+
+def schema_version_of(blob):
+    """Questionnaire schema version a blob was encoded with"""
+    if not blob or blob[0] != CODEC_FORMAT:
+        raise ValueError(f"Unknown answer blob format: {blob[:1]!r}")
+    return _read_varint(blob, 1)[0]
+
+class AnswerCodec:
+    """Lossless binary form of an answer dict {question text: option}.
+
+    Each answer is stored as the index of its question in the schema and the
+    index of its option (or the indices of the selected options of a checkbox
+    question) as varints, instead of the full French texts. Free text, answers
+    that are not one of the options and keys that are not question texts are
+    kept verbatim, so ``decode(encode(answers)) == answers`` for any dict of
+    strings, key order included. The blob starts with the schema ``version``,
+    which the decoder must match.
+    """
+
+    def __init__(self, schema, version):
+        self.schema = schema
+        self.version = int(version)
+        self.fingerprint = schema_fingerprint(schema)
+        # question text -> (question index, {option: option index})
+        self._questions = {
+            text: (index, {option: i for i, option in enumerate(options)})
+            for index, (_, text, _, options) in enumerate(schema)
+        }
+        self._entries = [(text, options) for _, text, _, options in schema]
+
+    def encode(self, answers):
+        """Encode an answer dict into bytes"""
+        out = bytearray([CODEC_FORMAT])
+        _write_varint(out, self.version)
+        for key, value in answers.items():
+            entry = self._questions.get(key) if isinstance(value, str) else None
+            if entry is None:
+                _write_varint(out, _EXTRA)
+                _write_str(out, str(key))
+                _write_str(out, json.dumps(value, ensure_ascii=False))
+                continue
+
+            index, options = entry
+            option = options.get(value)
+            if option is not None:
+                _write_varint(out, index << 2 | _OPTION)
+                _write_varint(out, option)
+                continue
+
+            parts = value.split(CHECKBOX_SEPARATOR)
+            selected = [options.get(part) for part in parts]
+            if len(parts) > 1 and None not in selected:
+                _write_varint(out, index << 2 | _OPTIONS)
+                _write_varint(out, len(selected))
+                for option in selected:
+                    _write_varint(out, option)
+            else:
+                _write_varint(out, index << 2 | _TEXT)
+                _write_str(out, value)
+        return bytes(out)
+
+    def decode(self, blob):
+        """Decode bytes produced by encode back into the answer dict"""
+        version = schema_version_of(blob)
+        if version != self.version:
+            raise ValueError(f"Answer blob uses schema {version}, codec is schema {self.version}")
+
+        pos = _read_varint(blob, 1)[1]
+        answers = {}
+        while pos < len(blob):
+            header, pos = _read_varint(blob, pos)
+            kind, index = header & 3, header >> 2
+            if kind == _EXTRA:
+                key, pos = _read_str(blob, pos)
+                value, pos = _read_str(blob, pos)
+                answers[key] = json.loads(value)
+                continue
+
+            text, options = self._entries[index]
+            if kind == _OPTION:
+                option, pos = _read_varint(blob, pos)
+                answers[text] = options[option]
+            elif kind == _OPTIONS:
+                count, pos = _read_varint(blob, pos)
+                selected = []
+                for _ in range(count):
+                    option, pos = _read_varint(blob, pos)
+                    selected.append(options[option])
+                answers[text] = CHECKBOX_SEPARATOR.join(selected)
+            else:
+                answers[text], pos = _read_str(blob, pos)
+        return answers
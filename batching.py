@@ -0,0 +1,78 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """Collect concurrent requests into a queue and score them in batches.
+
+    A background thread takes the first pending item, then keeps collecting
+    until ``max_batch_size`` items are queued or ``max_latency_ms`` has passed,
+    whichever comes first, and hands the whole batch to ``batch_fn``, which
+    must return one result per item, in order.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=64, max_latency_ms=5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency = max(0.0, float(max_latency_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, item):
+        """Queue one item, return a Future resolved with its result"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Deadline reached: still take what is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future in batch]
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            except Exception as e:
+                logging.error(f"Batch of {len(batch)} failed: {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "pending": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_latency_ms": self.max_latency * 1000.0
+        }
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import numpy as np
+from database import StudentDatabase, STORAGE_PROFILES
+from synthetic_data import SurveySampler, RuleLabeler, populate_database
+
+# Requêtes du tableau de bord (mêmes formes que server.py et advisor_interface.py)
+DASHBOARD_QUERIES = {
+    "students": '''
+        SELECT s.student_id, s.full_name, s.class, c.class_code,
+               l.domaine, l.confidence, l.submission_date
+        FROM students s
+        LEFT JOIN classes c ON s.class = c.class_name
+        LEFT JOIN student_latest_response l ON s.student_id = l.student_id
+        ORDER BY s.class, s.full_name
+    ''',
+    "classes": '''
+        SELECT c.class_name, c.class_code, COUNT(s.student_id) as student_count
+        FROM classes c
+        LEFT JOIN students s ON c.class_name = s.class
+        GROUP BY c.class_name, c.class_code
+        ORDER BY c.class_name
+    ''',
+    "domains": "SELECT domaine, COUNT(*) FROM student_latest_response WHERE domaine IS NOT NULL GROUP BY domaine",
+    "counts": "SELECT COUNT(*) FROM student_responses"
+}
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000 if samples else float("nan")
+
+def run_profile(profile, seed_db, writers, submits_per_writer, readers, work_dir):
+    """Soumissions concurrentes (un commit chacune) pendant que des lecteurs interrogent le tableau de bord"""
+    db_path = os.path.join(work_dir, f"{profile}.db")
+    shutil.copyfile(seed_db, db_path)
+    db = StudentDatabase(db_path, pool_size=writers + readers + 1, profile=profile)
+    with db.cursor() as cursor:
+        student_ids = [row[0] for row in cursor.execute("SELECT student_id FROM students").fetchall()]
+
+    payload = {"domaine": "Informatique / Ingénierie", "confidence": 87.5, "answers": {"Quel est ton âge ?": "16-17 ans"}}
+    stop = threading.Event()
+    latencies = {name: [] for name in DASHBOARD_QUERIES}
+    failures = []
+
+    def writer(index):
+        rng = np.random.default_rng(index)
+        for _ in range(submits_per_writer):
+            if not db.save_student_responses(student_ids[rng.integers(len(student_ids))], payload):
+                failures.append("submit")
+
+    def reader():
+        while not stop.is_set():
+            for name, query in DASHBOARD_QUERIES.items():
+                start = time.perf_counter()
+                with db.cursor() as cursor:
+                    cursor.execute(query).fetchall()
+                latencies[name].append(time.perf_counter() - start)
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in reader_threads:
+        thread.start()
+    start = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+    db.close()
+
+    submits = writers * submits_per_writer - len(failures)
+    return {
+        "profile": profile,
+        "submits_per_s": submits / max(elapsed, 1e-9),
+        "failures": len(failures),
+        **{f"{name}_p50_ms": percentile_ms(samples, 50) for name, samples in latencies.items()},
+        **{f"{name}_p95_ms": percentile_ms(samples, 95) for name, samples in latencies.items()}
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare les profils de stockage SQLite (soumissions et tableau de bord)")
+    parser.add_argument("--profiles", default=",".join(STORAGE_PROFILES), help="Profils à comparer, séparés par des virgules")
+    parser.add_argument("--classes", type=int, default=40)
+    parser.add_argument("--students-per-class", type=int, default=30)
+    parser.add_argument("--max-responses", type=int, default=3, help="Historique initial par élève")
+    parser.add_argument("--writers", type=int, default=4, help="Threads de soumission")
+    parser.add_argument("--submits", type=int, default=250, help="Soumissions par thread")
+    parser.add_argument("--readers", type=int, default=2, help="Threads du tableau de bord")
+    parser.add_argument("--dir", default=None, help="Dossier de travail (défaut: dossier temporaire, sur le même disque que la vraie base si possible)")
+    args = parser.parse_args(argv)
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    work_dir = args.dir or tempfile.mkdtemp(prefix="orientation_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        # Même base de départ pour tous les profils
+        seed_db = os.path.join(work_dir, "seed.db")
+        seed = StudentDatabase(seed_db, profile="throughput")
+        sampler = SurveySampler()
+        populate_database(seed, sampler, RuleLabeler(sampler), args.classes, args.students_per_class, args.max_responses)
+        with seed.cursor() as cursor:
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        seed.close()
+
+        results = [
+            run_profile(profile, seed_db, args.writers, args.submits, args.readers, work_dir)
+            for profile in profiles
+        ]
+    finally:
+        if not args.dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n=== PROFILS DE STOCKAGE ({args.writers} x {args.submits} soumissions, {args.readers} lecteurs) ===")
+    print(f"{'Profil':<12} {'Soumissions/s':>14} {'Élèves p50/p95 (ms)':>22} "
+          f"{'Classes p50/p95 (ms)':>22} {'Échecs':>7}")
+    for r in results:
+        print(f"{r['profile']:<12} {r['submits_per_s']:>14.0f} "
+              f"{r['students_p50_ms']:>10.1f} / {r['students_p95_ms']:<9.1f} "
+              f"{r['classes_p50_ms']:>10.1f} / {r['classes_p95_ms']:<9.1f} {r['failures']:>7}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
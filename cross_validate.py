@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+from hyperparameter_search import init_worker
+
+def fold_indices(y, n_splits, seed):
+    """Découpage stratifié, identique dans le parent et dans chaque processus"""
+    from sklearn.model_selection import StratifiedKFold
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+def train_fold(fold, n_splits, csv_path, seed, epochs=100, batch_size=32, patience=5):
+    """Entraîne le modèle sur un pli et l'évalue sur le pli retenu"""
+    from sklearn.metrics import accuracy_score, f1_score
+    from tensorflow.keras.callbacks import EarlyStopping
+    from train_orientation_model import build_model
+    from training_data import load_encoded_dataset
+
+    dataset = load_encoded_dataset(csv_path)
+    X, y = dataset.X, np.asarray(dataset.y)
+    train_idx, test_idx = fold_indices(y, n_splits, seed)[fold]
+    n_classes = len(dataset.label_encoder.classes_)
+
+    model = build_model(X.shape[1], n_classes)
+    start = time.perf_counter()
+    model.fit(
+        X[train_idx], y[train_idx],
+        validation_split=0.2,
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)],
+        verbose=0
+    )
+    train_time = time.perf_counter() - start
+
+    y_pred = np.argmax(model(X[test_idx], training=False).numpy(), axis=1)
+    return {
+        "fold": fold,
+        "accuracy": accuracy_score(y[test_idx], y_pred),
+        "f1": f1_score(y[test_idx], y_pred, labels=range(n_classes), average=None, zero_division=0),
+        "train_time_s": train_time
+    }
+
+def cross_validate(csv_path="ressources/data/dataset_orientation.csv", n_splits=5, workers=None,
+                   threads_per_worker=1, seed=42):
+    """Validation croisée stratifiée, un processus par pli"""
+    from training_data import load_encoded_dataset
+
+    # Encodage (ou lecture du cache) une seule fois avant de lancer les processus
+    dataset = load_encoded_dataset(csv_path)
+    classes = dataset.label_encoder.classes_
+    workers = workers or max(1, min(n_splits, (os.cpu_count() or 1) // threads_per_worker))
+    print(f"{n_splits} plis sur {len(dataset.y)} lignes, {workers} processus x {threads_per_worker} threads")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(threads_per_worker,)
+    ) as executor:
+        folds = list(executor.map(
+            train_fold, range(n_splits), [n_splits] * n_splits,
+            [csv_path] * n_splits, [seed] * n_splits
+        ))
+    elapsed = time.perf_counter() - start
+
+    accuracies = np.array([f["accuracy"] for f in folds])
+    f1 = np.stack([f["f1"] for f in folds])
+
+    print(f"\n=== VALIDATION CROISÉE ({n_splits} plis) ===")
+    for f in folds:
+        print(f"Pli {f['fold'] + 1}: accuracy {f['accuracy']:.4f} ({f['train_time_s']:.1f}s)")
+    print(f"Accuracy: {accuracies.mean():.4f} ± {accuracies.std():.4f}")
+    print(f"F1 macro: {f1.mean(axis=1).mean():.4f} ± {f1.mean(axis=1).std():.4f}")
+    print(f"\n{'Classe':<32} {'F1 moyen':>9} {'Écart-type':>11}")
+    for name, mean, std in zip(classes, f1.mean(axis=0), f1.std(axis=0)):
+        print(f"{name:<32} {mean:>9.4f} {std:>11.4f}")
+    print(f"\nDurée totale: {elapsed:.1f}s")
+
+    return {
+        "accuracy_mean": float(accuracies.mean()),
+        "accuracy_std": float(accuracies.std()),
+        "f1_mean": dict(zip(classes, f1.mean(axis=0).tolist())),
+        "f1_std": dict(zip(classes, f1.std(axis=0).tolist())),
+        "folds": folds
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Évaluation du modèle par validation croisée stratifiée")
+    parser.add_argument("--csv", default="ressources/data/dataset_orientation.csv")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut: un par pli, dans la limite des cœurs)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    cross_validate(args.csv, args.folds, args.workers, args.threads_per_worker, args.seed)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,63 @@ import json
 from datetime import datetime, date
 import logging
 import sys
+import queue
+import threading
+from contextlib import contextmanager
+from answer_codec import AnswerCodec, questionnaire_schema, schema_fingerprint, schema_version_of
+
+# Storage profiles: PRAGMAs applied to every pooled connection.
+# WAL lets dashboard readers run while a submission is being written;
+# "synchronous" trades durability of the last commits on power loss for speed.
+STORAGE_PROFILES = {
+    # fsync on every commit: nothing committed is lost, even on power failure
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -2000,        # KiB (negative = size in KiB, SQLite default)
+        "temp_store": "DEFAULT",
+        "busy_timeout": 10000       # ms
+    },
+    # fsync at checkpoints only: safe against crashes of the application
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000
+    },
+    # no fsync: for benchmarks, bulk loads and throwaway databases
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000
+    }
+}
+
+DEFAULT_STORAGE_PROFILE = os.environ.get("ORIENTATION_DB_PROFILE", "balanced").strip().lower()
+
+# Typed columns of student_responses extracted from response_data at insert time
+RESPONSE_COLUMNS = ("domaine", "confidence", "model_version", "local_backup")
+
+# Upsert of a student's latest-response row, completed with a SELECT of the new response.
+# Only replaces the current row if the new response is at least as recent.
+LATEST_RESPONSE_UPSERT = '''
+    INSERT INTO student_latest_response (student_id, response_id, domaine, confidence, submission_date)
+'''
+LATEST_RESPONSE_CONFLICT = '''
+    ON CONFLICT(student_id) DO UPDATE SET
+        response_id = excluded.response_id,
+        domaine = excluded.domaine,
+        confidence = excluded.confidence,
+        submission_date = excluded.submission_date
+    WHERE (excluded.submission_date, excluded.response_id)
+        >= (student_latest_response.submission_date, student_latest_response.response_id)
+'''
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -18,53 +75,169 @@ def resource_path(relative_path):
     
     return os.path.join(base_path, relative_path)
 
+class ConnectionPool:
+    """Bounded pool of SQLite connections, checked out one per thread.
+
+    A thread keeps the same connection for nested checkouts (a method that
+    calls another one shares its connection), so at most ``max_size``
+    threads hold a connection at once; others wait up to ``timeout``
+    seconds for one to be returned. Transactions are left to the caller
+    (see StudentDatabase.cursor).
+    """
+
+    def __init__(self, db_path, max_size=8, timeout=10, on_connect=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.on_connect = on_connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self):
+        # Connections move between threads of the pool, never used by two at once
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        if self.on_connect:
+            self.on_connect(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Check out this thread's connection (reused if the thread already holds one)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(f"No database connection available after {self.timeout}s")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def _release(self, conn):
+        try:
+            # Never hand over a connection with a pending transaction
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        except sqlite3.Error as e:
+            logging.warning(f"Discarding broken database connection: {str(e)}")
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """Close idle connections; connections in use are closed when returned"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
 class StudentDatabase:
-    def __init__(self, db_path=None):
-        """Initialize database connection with resource path handling"""
+    def __init__(self, db_path=None, pool_size=8, profile=None):
+        """Initialize database connection pool with resource path handling"""
         if db_path is None:
             db_path = resource_path('ressources/data/students.db')
         
+        profile = profile or DEFAULT_STORAGE_PROFILE
+        if profile not in STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile: {profile} (expected one of {list(STORAGE_PROFILES)})")
+        
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
+        self.pool_size = pool_size
+        self.profile = profile
+        self.pool = None
+        # Depth of nested cursor() blocks on each thread
+        self._local = threading.local()
+        # Answer codecs by questionnaire schema version (current one set by _create_tables)
+        self.answer_codec = None
+        self._answer_codecs = {}
         self.connect()
 
     def connect(self):
-        """Establish database connection with error handling"""
+        """Create the connection pool and the schema, with error handling"""
         try:
             # Ensure the directory exists
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            self.conn = sqlite3.connect(
+            if self.pool is not None:
+                self.pool.close_all()
+            self.pool = ConnectionPool(
                 self.db_path,
+                max_size=self.pool_size,
                 timeout=10,
-                check_same_thread=False  # Allows multithreaded access
+                on_connect=self._configure_connection
             )
-            self.conn.execute("PRAGMA foreign_keys = ON")
-            self.cursor = self.conn.cursor()
             self._create_tables()
-            logging.info("Database connection established")
+            logging.info(f"Database connection established (profile: {self.profile})")
             return True
         except Exception as e:
             logging.critical(f"Database connection failed: {str(e)}")
+            self.pool = None
             return False
 
+    def _configure_connection(self, conn):
+        """Per-connection settings, applied when the pool opens a connection"""
+        conn.execute("PRAGMA foreign_keys = ON")
+        for pragma, value in STORAGE_PROFILES[self.profile].items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+    @contextmanager
+    def cursor(self):
+        """Short-lived cursor on this thread's pooled connection.
+
+        The block runs in a transaction: committed on success, rolled back if
+        it raises. Nested blocks on the same thread share the connection and
+        the outermost block's transaction, which only ends when that block
+        exits.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            depth = getattr(self._local, "depth", 0)
+            self._local.depth = depth + 1
+            try:
+                if depth:
+                    yield cursor
+                else:
+                    with conn:
+                        yield cursor
+            finally:
+                self._local.depth = depth
+                cursor.close()
+
     def _ensure_connection(self):
-        """Ensure database connection is active"""
-        if self.conn is None:
-            return self.reconnect()
-        try:
-            # Test connection
-            self.cursor.execute("SELECT 1")
-            return True
-        except sqlite3.Error:
+        """Ensure the connection pool is available"""
+        if self.pool is None:
             return self.reconnect()
+        return True
 
     def reconnect(self):
-        """Reconnect to the database"""
+        """Recreate the connection pool"""
         try:
-            if self.conn:
-                self.conn.close()
             return self.connect()
         except Exception as e:
             logging.error(f"Reconnection failed: {str(e)}")
@@ -92,6 +265,33 @@ class StudentDatabase:
                 synced INTEGER DEFAULT 0,
                 FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE)''',
             
+            # Predictions recomputed for stored responses (one per model version)
+            '''CREATE TABLE IF NOT EXISTS response_predictions (
+                response_id INTEGER NOT NULL,
+                model_version TEXT NOT NULL,
+                domaine TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                scored_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (response_id, model_version),
+                FOREIGN KEY (response_id) REFERENCES student_responses(id) ON DELETE CASCADE)''',
+            
+            # Most recent response of each student, maintained on every submission
+            '''CREATE TABLE IF NOT EXISTS student_latest_response (
+                student_id TEXT PRIMARY KEY,
+                response_id INTEGER NOT NULL,
+                domaine TEXT,
+                confidence REAL,
+                submission_date DATETIME,
+                FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+                FOREIGN KEY (response_id) REFERENCES student_responses(id) ON DELETE CASCADE)''',
+            
+            # Questionnaire versions the stored answer blobs refer to
+            '''CREATE TABLE IF NOT EXISTS answer_schemas (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                fingerprint TEXT UNIQUE NOT NULL,
+                schema TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+
             # Classes table
             '''CREATE TABLE IF NOT EXISTS classes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -123,16 +323,35 @@ class StudentDatabase:
             "CREATE INDEX IF NOT EXISTS idx_student_id ON students(student_id)",
             "CREATE INDEX IF NOT EXISTS idx_student_class ON students(class)",
             "CREATE INDEX IF NOT EXISTS idx_response_student ON student_responses(student_id)",
+            "CREATE INDEX IF NOT EXISTS idx_prediction_version ON response_predictions(model_version)",
+            "CREATE INDEX IF NOT EXISTS idx_response_validated ON student_responses(id) WHERE validated_domaine IS NOT NULL",
+            "CREATE INDEX IF NOT EXISTS idx_response_domaine ON student_responses(domaine, confidence)",
+            "CREATE INDEX IF NOT EXISTS idx_response_confidence ON student_responses(confidence)",
+            "CREATE INDEX IF NOT EXISTS idx_response_model_version ON student_responses(model_version)",
+            "CREATE INDEX IF NOT EXISTS idx_response_local_backup ON student_responses(id) WHERE local_backup = 1",
+            "CREATE INDEX IF NOT EXISTS idx_latest_domaine ON student_latest_response(domaine, confidence)",
             "CREATE INDEX IF NOT EXISTS idx_class_name ON classes(class_name)",
             "CREATE INDEX IF NOT EXISTS idx_class_code ON classes(class_code)"
         ]
 
         try:
-            # Execute all schema creation statements
-            for statement in schema + indexes:
-                self.cursor.execute(statement)
-            self.conn.commit()
-            
+            with self.cursor() as cursor:
+                # Execute all schema creation statements
+                for statement in schema:
+                    cursor.execute(statement)
+                self._register_answer_schema(cursor)
+                added_columns = self._migrate_schema(cursor)
+                if added_columns & set(RESPONSE_COLUMNS):
+                    self._backfill_response_columns(cursor)
+                converted = self._migrate_answer_blobs(cursor) if "answers" in added_columns else 0
+                for statement in indexes:
+                    cursor.execute(statement)
+                self._backfill_latest_responses(cursor)
+
+            # Give the space freed by the conversion back to the file system
+            if converted:
+                self.compact()
+
             # Create default admin if none exists
             self._create_default_admin()
             
@@ -140,19 +359,108 @@ class StudentDatabase:
             logging.error(f"Database initialization failed: {str(e)}")
             raise
 
+    def _migrate_schema(self, cursor) -> set:
+        """Add columns introduced after the first release to existing databases, return the added ones"""
+        added_columns = [
+            # Domain confirmed by an advisor, used as label for incremental training
+            ("student_responses", "validated_domaine", "TEXT"),
+            # Fields of response_data, written at insert time so they can be aggregated in SQL
+            ("student_responses", "domaine", "TEXT"),
+            ("student_responses", "confidence", "REAL"),
+            ("student_responses", "model_version", "TEXT"),
+            ("student_responses", "local_backup", "INTEGER NOT NULL DEFAULT 0"),
+            # Questionnaire answers encoded by AnswerCodec, taken out of response_data
+            ("student_responses", "answers", "BLOB"),
+        ]
+        added = set()
+        for table, column, definition in added_columns:
+            cursor.execute(f"PRAGMA table_info({table})")
+            if column not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                logging.info(f"Added column {table}.{column}")
+                added.add(column)
+        return added
+
+    def _backfill_response_columns(self, cursor, chunk_size: int = 5000):
+        """Fill the typed columns of responses stored before they existed"""
+        after_id, count = 0, 0
+        while True:
+            rows = cursor.execute('''
+                SELECT id, response_data FROM student_responses WHERE id > ? ORDER BY id LIMIT ?
+            ''', (after_id, chunk_size)).fetchall()
+            if not rows:
+                break
+            updates = []
+            for response_id, response_data in rows:
+                try:
+                    responses = json.loads(response_data)
+                except (json.JSONDecodeError, TypeError):
+                    responses = {}
+                updates.append((*self._response_columns(responses if isinstance(responses, dict) else {}), response_id))
+            cursor.executemany('''
+                UPDATE student_responses SET domaine = ?, confidence = ?, model_version = ?, local_backup = ?
+                WHERE id = ?
+            ''', updates)
+            after_id, count = rows[-1][0], count + len(rows)
+        if count:
+            logging.info(f"Backfilled typed columns of {count} responses")
+
+    def _register_answer_schema(self, cursor):
+        """Record the current questionnaire (questions.QUESTIONS) and make it the encoding schema"""
+        schema = questionnaire_schema()
+        fingerprint = schema_fingerprint(schema)
+        cursor.execute("INSERT OR IGNORE INTO answer_schemas (fingerprint, schema) VALUES (?, ?)",
+                       (fingerprint, json.dumps(schema, ensure_ascii=False)))
+        version = cursor.execute("SELECT version FROM answer_schemas WHERE fingerprint = ?",
+                                 (fingerprint,)).fetchone()[0]
+        self.answer_codec = AnswerCodec(schema, version)
+        self._answer_codecs[version] = self.answer_codec
+
+    def _migrate_answer_blobs(self, cursor, chunk_size: int = 5000) -> int:
+        """Move the answers of existing responses from response_data to the answers blob"""
+        after_id, count = 0, 0
+        while True:
+            rows = cursor.execute('''
+                SELECT id, response_data FROM student_responses WHERE id > ? ORDER BY id LIMIT ?
+            ''', (after_id, chunk_size)).fetchall()
+            if not rows:
+                break
+            updates = []
+            for response_id, response_data in rows:
+                try:
+                    responses = json.loads(response_data)
+                except (json.JSONDecodeError, TypeError):
+                    continue
+                if isinstance(responses, dict) and self._has_answers(responses):
+                    updates.append((*self._split_answers(responses), response_id))
+            cursor.executemany("UPDATE student_responses SET response_data = ?, answers = ? WHERE id = ?", updates)
+            after_id, count = rows[-1][0], count + len(updates)
+        if count:
+            logging.info(f"Encoded the answers of {count} responses")
+        return count
+
+    def _backfill_latest_responses(self, cursor):
+        """Fill student_latest_response once for databases created before it existed"""
+        if cursor.execute("SELECT 1 FROM student_latest_response LIMIT 1").fetchone():
+            return
+        if not cursor.execute("SELECT 1 FROM student_responses LIMIT 1").fetchone():
+            return
+        count = self._refresh_latest_responses(cursor)
+        logging.info(f"Backfilled latest responses of {count} students")
+
     def _create_default_admin(self):
         """Create default admin account if no admins exist"""
         try:
-            self.cursor.execute("SELECT COUNT(*) FROM admins")
-            if self.cursor.fetchone()[0] == 0:
-                password_hash = self._hash_password("admin123")
-                self.cursor.execute('''
-                    INSERT INTO admins 
-                    (username, password_hash, full_name, is_superadmin)
-                    VALUES (?, ?, ?, 1)
-                ''', ("admin", password_hash, "Administrateur Principal"))
-                self.conn.commit()
-                logging.info("Default admin account created")
+            with self.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM admins")
+                if cursor.fetchone()[0] == 0:
+                    password_hash = self._hash_password("admin123")
+                    cursor.execute('''
+                        INSERT INTO admins 
+                        (username, password_hash, full_name, is_superadmin)
+                        VALUES (?, ?, ?, 1)
+                    ''', ("admin", password_hash, "Administrateur Principal"))
+                    logging.info("Default admin account created")
         except Exception as e:
             logging.error(f"Failed to create default admin: {str(e)}")
 
@@ -169,11 +477,11 @@ class StudentDatabase:
                 return False
 
             password_hash = self._hash_password(password)
-            self.cursor.execute('''
-                INSERT INTO students (student_id, password_hash, full_name, class)
-                VALUES (?, ?, ?, ?)
-            ''', (student_id.strip(), password_hash, full_name.strip(), class_name))
-            self.conn.commit()
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO students (student_id, password_hash, full_name, class)
+                    VALUES (?, ?, ?, ?)
+                ''', (student_id.strip(), password_hash, full_name.strip(), class_name))
             return True
         except sqlite3.IntegrityError:
             logging.warning(f"Student ID already exists: {student_id}")
@@ -188,10 +496,11 @@ class StudentDatabase:
             return False
             
         try:
-            self.cursor.execute('''
-                SELECT password_hash FROM students WHERE student_id = ?
-            ''', (student_id,))
-            result = self.cursor.fetchone()
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT password_hash FROM students WHERE student_id = ?
+                ''', (student_id,))
+                result = cursor.fetchone()
             
             success = False
             if result and self._check_password(password, result[0]):
@@ -212,10 +521,11 @@ class StudentDatabase:
             return None
             
         try:
-            self.cursor.execute('''
-                SELECT full_name, class FROM students WHERE student_id = ?
-            ''', (student_id,))
-            return self.cursor.fetchone()
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT full_name, class FROM students WHERE student_id = ?
+                ''', (student_id,))
+                return cursor.fetchone()
         except Exception as e:
             logging.error(f"Error fetching student info: {str(e)}")
             return None
@@ -233,19 +543,23 @@ class StudentDatabase:
                 logging.error(f"Attempt to save for non-existent student: {student_id}")
                 return False
 
-            # Safe JSON serialization
-            response_json = self._safe_json_dump(responses)
-            if response_json == "{}":
+            # Safe JSON serialization (the answers go to the binary blob)
+            response_json, answers_blob = self._split_answers(responses)
+            if response_json == "{}" and answers_blob is None:
                 logging.error("Failed to serialize responses to JSON")
                 return False
 
-            # Execute with transaction
-            with self.conn:
-                self.cursor.execute('''
-                    INSERT INTO student_responses (student_id, response_data)
-                    VALUES (?, ?)
-                ''', (student_id, response_json))
-            
+            # Execute with transaction (response + latest-response row together)
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO student_responses
+                    (student_id, response_data, answers, domaine, confidence, model_version, local_backup)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (student_id, response_json, answers_blob, *self._response_columns(responses)))
+                cursor.execute(LATEST_RESPONSE_UPSERT + '''
+                    SELECT student_id, id, domaine, confidence, submission_date FROM student_responses WHERE id = ?
+                ''' + LATEST_RESPONSE_CONFLICT, (cursor.lastrowid,))
+
             logging.info(f"Successfully saved responses for student: {student_id}")
             return True
             
@@ -270,18 +584,241 @@ class StudentDatabase:
             return None
             
         try:
-            self.cursor.execute('''
-                SELECT response_data FROM student_responses 
-                WHERE student_id = ?
-                ORDER BY submission_date DESC 
-                LIMIT 1
-            ''', (student_id,))
-            result = self.cursor.fetchone()
-            return json.loads(result[0]) if result else None
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT r.response_data, r.answers FROM student_latest_response l
+                    JOIN student_responses r ON r.id = l.response_id
+                    WHERE l.student_id = ?
+                ''', (student_id,))
+                result = cursor.fetchone()
+            if not result:
+                return None
+            responses = json.loads(result[0])
+            if result[1] is not None:
+                responses["answers"] = self.decode_answers(result[1])
+            return responses
         except Exception as e:
             logging.error(f"Error fetching last response: {str(e)}")
             return None
 
+    def get_domain_distribution(self, latest_only: bool = True,
+                                min_confidence: Optional[float] = None) -> List[Tuple[str, int]]:
+        """Count responses per domain, most frequent first.
+
+        With ``latest_only`` only each student's most recent response is
+        counted; ``min_confidence`` (in %) drops less confident predictions.
+        """
+        if not self._ensure_connection():
+            return []
+
+        table = "student_latest_response" if latest_only else "student_responses"
+        query = f"SELECT domaine, COUNT(*) FROM {table} WHERE domaine IS NOT NULL"
+        params = []
+        if min_confidence is not None:
+            query += " AND confidence >= ?"
+            params.append(float(min_confidence))
+        query += " GROUP BY domaine ORDER BY COUNT(*) DESC, domaine"
+
+        try:
+            with self.cursor() as cursor:
+                return cursor.execute(query, params).fetchall()
+        except Exception as e:
+            logging.error(f"Error fetching domain distribution: {str(e)}")
+            return []
+
+    def _response_columns(self, responses: Dict[str, Any]) -> Tuple[Optional[str], Optional[float], Optional[str], int]:
+        """Typed (domaine, confidence, model_version, local_backup) columns of a response payload"""
+        domaine = responses.get("domaine")
+        try:
+            confidence = float(responses["confidence"])
+        except (KeyError, TypeError, ValueError):
+            confidence = None
+        model_version = responses.get("model_version")
+        return (
+            str(domaine) if domaine is not None else None,
+            confidence,
+            str(model_version) if model_version is not None else None,
+            int(bool(responses.get("local_backup")))
+        )
+
+    @staticmethod
+    def _has_answers(responses: Dict[str, Any]) -> bool:
+        return isinstance(responses.get("answers"), dict) and bool(responses["answers"])
+
+    def _split_answers(self, responses: Dict[str, Any]) -> Tuple[str, Optional[bytes]]:
+        """(response_data JSON without the answers, encoded answers) of a response payload"""
+        if not isinstance(responses, dict) or not self._has_answers(responses):
+            return self._safe_json_dump(responses), None
+        metadata = {key: value for key, value in responses.items() if key != "answers"}
+        return self._safe_json_dump(metadata), self.answer_codec.encode(responses["answers"])
+
+    def _codec_for(self, version: int) -> AnswerCodec:
+        codec = self._answer_codecs.get(version)
+        if codec is None:
+            with self.cursor() as cursor:
+                row = cursor.execute("SELECT schema FROM answer_schemas WHERE version = ?", (version,)).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown answer schema version: {version}")
+            codec = self._answer_codecs[version] = AnswerCodec(json.loads(row[0]), version)
+        return codec
+
+    def decode_answers(self, blob: bytes) -> Dict[str, Any]:
+        """Decode an answers blob into {question text: answer}, whatever questionnaire version it was saved with"""
+        return self._codec_for(schema_version_of(blob)).decode(blob)
+
+    def _row_answers(self, response_data: str, blob: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """Answers of a stored response (from the blob, or from response_data for rows not converted)"""
+        if blob is not None:
+            return self.decode_answers(blob)
+        try:
+            responses = json.loads(response_data)
+        except (json.JSONDecodeError, TypeError):
+            return None
+        return responses["answers"] if isinstance(responses, dict) and self._has_answers(responses) else None
+
+    def _refresh_latest_responses(self, cursor, student_ids: Optional[List[str]] = None) -> int:
+        """Recompute student_latest_response for some students (all of them if None)"""
+        refresh_query = '''
+            INSERT OR REPLACE INTO student_latest_response
+            (student_id, response_id, domaine, confidence, submission_date)
+            SELECT r.student_id, r.id, r.domaine, r.confidence, r.submission_date FROM student_responses r
+            WHERE r.id = (
+                SELECT r2.id FROM student_responses r2 WHERE r2.student_id = r.student_id
+                ORDER BY r2.submission_date DESC, r2.id DESC LIMIT 1
+            )
+        '''
+        if student_ids is None:
+            return cursor.execute(refresh_query).rowcount
+
+        count = 0
+        for start in range(0, len(student_ids), 500):
+            chunk = student_ids[start:start + 500]
+            count += cursor.execute(
+                refresh_query + f" AND r.student_id IN ({', '.join('?' * len(chunk))})", chunk
+            ).rowcount
+        return count
+
+    def iter_response_chunks(self, after_id: int = 0, chunk_size: int = 1000):
+        """Yield (id, student_id, answers dict or None) rows in id order, chunk by chunk"""
+        while self._ensure_connection():
+            # The connection goes back to the pool while the caller handles the chunk
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT id, student_id, response_data, answers FROM student_responses
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (after_id, chunk_size))
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            yield [
+                (response_id, student_id, self._row_answers(response_data, blob))
+                for response_id, student_id, response_data, blob in rows
+            ]
+            after_id = rows[-1][0]
+
+    def save_response_predictions(self, predictions: List[Tuple[int, str, str, float]]) -> bool:
+        """Store (response_id, model_version, domaine, confidence) rows in one transaction"""
+        if not self._ensure_connection():
+            return False
+
+        try:
+            with self.cursor() as cursor:
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO response_predictions
+                    (response_id, model_version, domaine, confidence)
+                    VALUES (?, ?, ?, ?)
+                ''', predictions)
+                return True
+        except Exception as e:
+            logging.error(f"Error saving response predictions: {str(e)}")
+            return False
+
+    def set_validated_domain(self, response_id: int, domaine: Optional[str]) -> bool:
+        """Record the domain an advisor confirmed for a response (None clears it)"""
+        if not self._ensure_connection():
+            return False
+
+        try:
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    UPDATE student_responses SET validated_domaine = ? WHERE id = ?
+                ''', (domaine, response_id))
+                return cursor.rowcount == 1
+        except Exception as e:
+            logging.error(f"Error validating response domain: {str(e)}")
+            return False
+
+    def get_validated_responses(self, after_id: int = 0) -> List[Tuple[int, Optional[Dict[str, Any]], str]]:
+        """Get (id, answers dict or None, validated_domaine) of validated responses added after a watermark"""
+        if not self._ensure_connection():
+            return []
+
+        try:
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT id, response_data, answers, validated_domaine FROM student_responses
+                    WHERE validated_domaine IS NOT NULL AND id > ?
+                    ORDER BY id
+                ''', (after_id,))
+                rows = cursor.fetchall()
+            return [
+                (response_id, self._row_answers(response_data, blob), domaine)
+                for response_id, response_data, blob, domaine in rows
+            ]
+        except Exception as e:
+            logging.error(f"Error fetching validated responses: {str(e)}")
+            return []
+
+    # ========== BULK LOADING ==========
+    def bulk_insert_classes(self, classes: List[Tuple[str, str]]) -> bool:
+        """Insert (class_name, class_code) rows in one transaction, skipping existing ones"""
+        return self._bulk_insert('''
+            INSERT OR IGNORE INTO classes (class_name, class_code) VALUES (?, ?)
+        ''', classes)
+
+    def bulk_insert_students(self, students: List[Tuple[str, str, str, str]]) -> bool:
+        """Insert (student_id, password_hash, full_name, class) rows in one transaction, skipping existing ones"""
+        return self._bulk_insert('''
+            INSERT OR IGNORE INTO students (student_id, password_hash, full_name, class)
+            VALUES (?, ?, ?, ?)
+        ''', students)
+
+    def bulk_insert_responses(self, responses: List[Tuple[str, Dict[str, Any], str]]) -> bool:
+        """Insert (student_id, responses dict, submission_date) rows and refresh the latest responses, in one transaction"""
+        if not self._ensure_connection():
+            return False
+
+        try:
+            with self.cursor() as cursor:
+                cursor.executemany('''
+                    INSERT INTO student_responses
+                    (student_id, response_data, answers, submission_date, domaine, confidence, model_version, local_backup)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [
+                    (student_id, *self._split_answers(data), submitted, *self._response_columns(data))
+                    for student_id, data, submitted in responses
+                ])
+                self._refresh_latest_responses(cursor, list({student_id for student_id, _, _ in responses}))
+            return True
+        except Exception as e:
+            logging.error(f"Bulk insert failed: {str(e)}")
+            return False
+
+    def _bulk_insert(self, query: str, rows: List[Tuple]) -> bool:
+        """Run executemany in a single transaction"""
+        if not self._ensure_connection():
+            return False
+
+        try:
+            with self.cursor() as cursor:
+                cursor.executemany(query, rows)
+                return True
+        except Exception as e:
+            logging.error(f"Bulk insert failed: {str(e)}")
+            return False
+
     # ========== CLASS MANAGEMENT ==========
     def create_class(self, class_name: str, class_code: str) -> bool:
         """Create a new class"""
@@ -289,12 +826,12 @@ class StudentDatabase:
             return False
             
         try:
-            self.cursor.execute('''
-                INSERT INTO classes (class_name, class_code)
-                VALUES (?, ?)
-            ''', (class_name.strip(), class_code.strip()))
-            self.conn.commit()
-            return True
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO classes (class_name, class_code)
+                    VALUES (?, ?)
+                ''', (class_name.strip(), class_code.strip()))
+                return True
         except sqlite3.IntegrityError as e:
             logging.error(f"Class creation failed: {str(e)}")
             return False
@@ -308,11 +845,12 @@ class StudentDatabase:
             return None
             
         try:
-            self.cursor.execute('''
-                SELECT class_name FROM classes WHERE class_code = ?
-            ''', (class_code.strip(),))
-            result = self.cursor.fetchone()
-            return result[0] if result else None
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT class_name FROM classes WHERE class_code = ?
+                ''', (class_code.strip(),))
+                result = cursor.fetchone()
+                return result[0] if result else None
         except Exception as e:
             logging.error(f"Error fetching class name: {str(e)}")
             return None
@@ -323,10 +861,11 @@ class StudentDatabase:
             return None
             
         try:
-            self.cursor.execute('''
-                SELECT username, full_name FROM admins WHERE username = ?
-            ''', (username,))
-            return self.cursor.fetchone()
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT username, full_name FROM admins WHERE username = ?
+                ''', (username,))
+                return cursor.fetchone()
         except Exception as e:
             logging.error(f"Error fetching admin info: {str(e)}")
             return None
@@ -338,11 +877,12 @@ class StudentDatabase:
             return False
             
         try:
-            self.cursor.execute('''
-                SELECT password_hash FROM admins WHERE username = ?
-            ''', (username,))
-            result = self.cursor.fetchone()
-            return result and self._check_password(password, result[0])
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT password_hash FROM admins WHERE username = ?
+                ''', (username,))
+                result = cursor.fetchone()
+                return result and self._check_password(password, result[0])
         except Exception as e:
             logging.error(f"Admin login verification failed: {str(e)}")
             return False
@@ -362,11 +902,11 @@ class StudentDatabase:
             return
             
         try:
-            self.cursor.execute(f'''
-                UPDATE {table} SET last_login = CURRENT_TIMESTAMP 
-                WHERE {'student_id' if table == 'students' else 'username'} = ?
-            ''', (identifier,))
-            self.conn.commit()
+            with self.cursor() as cursor:
+                cursor.execute(f'''
+                    UPDATE {table} SET last_login = CURRENT_TIMESTAMP 
+                    WHERE {'student_id' if table == 'students' else 'username'} = ?
+                ''', (identifier,))
         except Exception as e:
             logging.error(f"Error updating last login: {str(e)}")
 
@@ -376,11 +916,11 @@ class StudentDatabase:
             return
             
         try:
-            self.cursor.execute('''
-                INSERT INTO login_attempts (student_id, success, ip_address)
-                VALUES (?, ?, ?)
-            ''', (student_id, int(success), ip_address))
-            self.conn.commit()
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO login_attempts (student_id, success, ip_address)
+                    VALUES (?, ?, ?)
+                ''', (student_id, int(success), ip_address))
         except Exception as e:
             logging.error(f"Error logging login attempt: {str(e)}")
 
@@ -405,6 +945,21 @@ class StudentDatabase:
             logging.error(f"JSON serialization error: {str(e)} - Data: {str(data)}")
             return "{}"
 
+    def compact(self) -> bool:
+        """Rebuild the database file to release its free pages (VACUUM)"""
+        if not self._ensure_connection():
+            return False
+
+        try:
+            size_before = os.path.getsize(self.db_path)
+            with self.pool.connection() as conn:
+                conn.execute("VACUUM")
+            logging.info(f"Database compacted: {size_before / 1e6:.1f} MB -> {os.path.getsize(self.db_path) / 1e6:.1f} MB")
+            return True
+        except Exception as e:
+            logging.error(f"Database compaction failed: {str(e)}")
+            return False
+
     def backup_database(self, backup_path: str) -> bool:
         """Create a backup of the database"""
         if not self._ensure_connection():
@@ -412,8 +967,8 @@ class StudentDatabase:
             
         try:
             backup_conn = sqlite3.connect(backup_path)
-            with backup_conn:
-                self.conn.backup(backup_conn)
+            with backup_conn, self.pool.connection() as conn:
+                conn.backup(backup_conn)
             backup_conn.close()
             return True
         except Exception as e:
@@ -426,34 +981,34 @@ class StudentDatabase:
             return None
             
         try:
-            # Verify the class exists
-            class_name = self.get_class_name(class_code)
-            if not class_name:
-                logging.error(f"Invalid class code: {class_code}")
-                return None
+            with self.cursor() as cursor:
+                # Verify the class exists
+                class_name = self.get_class_name(class_code)
+                if not class_name:
+                    logging.error(f"Invalid class code: {class_code}")
+                    return None
+
+                # Check if student already exists
+                cursor.execute('''
+                    SELECT student_id FROM students 
+                    WHERE full_name = ? AND class = ?
+                ''', (full_name.strip(), class_name))
+                result = cursor.fetchone()
 
-            # Check if student already exists
-            self.cursor.execute('''
-                SELECT student_id FROM students 
-                WHERE full_name = ? AND class = ?
-            ''', (full_name.strip(), class_name))
-            result = self.cursor.fetchone()
-
-            if result:
-                return result[0]  # Return existing student ID
-
-            # Create new student if not found
-            new_student_id = f"etu_{uuid.uuid4().hex[:6]}"
-            default_password_hash = self._hash_password("")  # Empty password by default
-
-            self.cursor.execute('''
-                INSERT INTO students (student_id, password_hash, full_name, class)
-                VALUES (?, ?, ?, ?)
-            ''', (new_student_id, default_password_hash, full_name.strip(), class_name))
-            self.conn.commit()
+                if result:
+                    return result[0]  # Return existing student ID
+
+                # Create new student if not found
+                new_student_id = f"etu_{uuid.uuid4().hex[:6]}"
+                default_password_hash = self._hash_password("")  # Empty password by default
+
+                cursor.execute('''
+                    INSERT INTO students (student_id, password_hash, full_name, class)
+                    VALUES (?, ?, ?, ?)
+                ''', (new_student_id, default_password_hash, full_name.strip(), class_name))
         
-            logging.info(f"Created new student: {new_student_id}")
-            return new_student_id
+                logging.info(f"Created new student: {new_student_id}")
+                return new_student_id
 
         except sqlite3.IntegrityError:
             logging.error(f"Student already exists: {full_name} in {class_name}")
@@ -468,10 +1023,11 @@ class StudentDatabase:
             return []
             
         try:
-            self.cursor.execute('''
-                SELECT class_name, class_code FROM classes ORDER BY class_name
-            ''')
-            return self.cursor.fetchall()
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT class_name, class_code FROM classes ORDER BY class_name
+                ''')
+                return cursor.fetchall()
         except Exception as e:
             logging.error(f"Error fetching classes: {str(e)}")
             return []
@@ -482,18 +1038,23 @@ class StudentDatabase:
             return 0
             
         try:
-            self.cursor.execute('''
-                SELECT COUNT(*) FROM students WHERE class = ?
-            ''', (class_name,))
-            return self.cursor.fetchone()[0]
+            with self.cursor() as cursor:
+                cursor.execute('''
+                    SELECT COUNT(*) FROM students WHERE class = ?
+                ''', (class_name,))
+                return cursor.fetchone()[0]
         except Exception as e:
             logging.error(f"Error counting students: {str(e)}")
             return 0
     
+    def close(self):
+        """Close the pooled connections"""
+        if self.pool is not None:
+            self.pool.close_all()
+
     def __del__(self):
-        """Clean up database connection"""
+        """Clean up database connections"""
         try:
-            if hasattr(self, 'conn') and self.conn:
-                self.conn.close()
+            self.close()
         except Exception as e:
-            logging.error(f"Error closing database: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error closing database: {str(e)}")
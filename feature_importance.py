@@ -0,0 +1,193 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+
+MODELS_DIR = "ressources/models"
+PRUNED_DIR = os.path.join(MODELS_DIR, "pruned")
+
+# Graine du découpage train/test du modèle déployé: importances, référence et
+# modèle réduit sont toujours évalués sur cette partie test (--seed n'y touche pas)
+SPLIT_SEED = 42
+
+# État de chaque processus du pool (chargé une fois par init_importance_worker)
+_worker = {}
+
+def test_split(dataset):
+    """Découpage utilisé à l'entraînement du modèle déployé (random_state=SPLIT_SEED)"""
+    from sklearn.model_selection import train_test_split
+    return train_test_split(np.asarray(dataset.X), np.asarray(dataset.y), test_size=0.2, random_state=SPLIT_SEED)
+
+def init_importance_worker(weights_path, csv_path, threads):
+    """Charge le réseau NumPy et la partie test une fois par processus"""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["OPENBLAS_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    from numpy_backend import NumpyDenseModel
+    from training_data import load_encoded_dataset
+
+    _, X_test, _, y_test = test_split(load_encoded_dataset(csv_path))
+    _worker["model"] = NumpyDenseModel.load(weights_path)
+    _worker["X"] = np.ascontiguousarray(X_test, dtype=np.float32)
+    _worker["y"] = y_test
+
+def batched_accuracy(model, X, y, batch_size=4096, permutation=None, columns=None):
+    """Accuracy par lots; si permutation est fournie, les colonnes données sont permutées ensemble"""
+    correct = 0
+    for start in range(0, len(y), batch_size):
+        end = min(start + batch_size, len(y))
+        block = X[start:end]
+        if permutation is not None:
+            block = block.copy()
+            block[:, columns] = X[permutation[start:end]][:, columns]
+        correct += int(np.sum(np.argmax(model.predict_proba(block), axis=1) == y[start:end]))
+    return correct / max(len(y), 1)
+
+def question_importance(q_id, columns, n_repeats=5, seed=42, batch_size=4096):
+    """Baisse d'accuracy quand toutes les colonnes d'une question sont permutées ensemble"""
+    model, X, y = _worker["model"], _worker["X"], _worker["y"]
+    baseline = batched_accuracy(model, X, y, batch_size)
+    rng = np.random.default_rng(seed)
+    drops = [
+        baseline - batched_accuracy(model, X, y, batch_size, rng.permutation(len(y)), columns)
+        for _ in range(n_repeats)
+    ]
+    return {
+        "question": q_id,
+        "n_columns": len(columns),
+        "importance": float(np.mean(drops)),
+        "importance_std": float(np.std(drops))
+    }
+
+def write_importances(results, path):
+    """Écrit le classement des questions en CSV"""
+    from questions import QUESTIONS
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["rang", "question", "colonnes", "importance", "ecart_type", "conservee", "texte"])
+        for rank, r in enumerate(results, 1):
+            writer.writerow([
+                rank, r["question"], r["n_columns"], f"{r['importance']:.5f}",
+                f"{r['importance_std']:.5f}", int(r["kept"]), QUESTIONS[r["question"]]["text"]
+            ])
+
+def compute_importances(csv_path, weights_path, workers=None, threads_per_worker=1, n_repeats=5, seed=42):
+    """Importance par permutation de chaque question, une question par tâche du pool"""
+    import joblib
+    from preprocessing import AnswerEncoder
+    from training_data import load_encoded_dataset
+
+    # Encodage (ou lecture du cache) une seule fois avant de lancer les processus
+    dataset = load_encoded_dataset(csv_path)
+    model_columns = joblib.load(os.path.join(MODELS_DIR, "nn_feature_columns.pkl"))
+    if list(model_columns) != dataset.feature_columns:
+        raise ValueError("Le modèle déployé n'a pas été entraîné sur ces colonnes: réentraînez-le d'abord")
+
+    groups = {q_id: cols for q_id, cols in AnswerEncoder(model_columns).question_columns().items() if cols}
+    workers = workers or max(1, min(len(groups), (os.cpu_count() or 1) // threads_per_worker))
+    print(f"{len(groups)} questions, {workers} processus x {threads_per_worker} threads, {n_repeats} permutations")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_importance_worker,
+        initargs=(weights_path, csv_path, threads_per_worker)
+    ) as executor:
+        results = list(executor.map(
+            question_importance, list(groups), list(groups.values()),
+            [n_repeats] * len(groups), [seed] * len(groups)
+        ))
+    results.sort(key=lambda r: -r["importance"])
+    return dataset, groups, results
+
+def retrain_pruned(dataset, groups, kept, output_dir=PRUNED_DIR, seed=42):
+    """Réentraîne le réseau sur les colonnes des questions conservées, renvoie son accuracy test"""
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import EarlyStopping
+    import joblib
+    from numpy_backend import export_and_verify
+    from train_orientation_model import build_model
+
+    columns = sorted(c for q_id in kept for c in groups[q_id])
+    X_train, X_test, y_train, y_test = test_split(dataset)
+    X_train, X_test = X_train[:, columns], X_test[:, columns]
+
+    tf.random.set_seed(seed)
+    model = build_model(len(columns), len(dataset.label_encoder.classes_))
+    model.fit(
+        X_train, y_train,
+        validation_split=0.2,
+        epochs=100,
+        batch_size=32,
+        callbacks=[EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)],
+        verbose=0
+    )
+    accuracy = float(np.mean(np.argmax(model(X_test, training=False).numpy(), axis=1) == y_test))
+
+    # Artefacts séparés: le modèle déployé n'est pas remplacé
+    os.makedirs(output_dir, exist_ok=True)
+    model.save(os.path.join(output_dir, "orientation_deep_model.h5"), save_format="h5")
+    export_and_verify(model, os.path.join(output_dir, "orientation_deep_model.npz"))
+    joblib.dump(dataset.label_encoder, os.path.join(output_dir, "nn_label_encoder.pkl"))
+    joblib.dump([dataset.feature_columns[c] for c in columns], os.path.join(output_dir, "nn_feature_columns.pkl"))
+    with open(os.path.join(output_dir, "questions.json"), 'w', encoding='utf-8') as f:
+        json.dump(kept, f, ensure_ascii=False, indent=2)
+    return accuracy, len(columns)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importance des questions par permutation et modèle réduit")
+    parser.add_argument("--csv", default="ressources/data/dataset_orientation.csv")
+    parser.add_argument("--weights", default=os.path.join(MODELS_DIR, "orientation_deep_model.npz"),
+                        help="Poids NumPy du modèle déployé")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut: cœurs / threads)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5, help="Permutations par question")
+    parser.add_argument("--threshold", type=float, default=0.0,
+                        help="Questions dont l'importance est inférieure ou égale à ce seuil retirées")
+    parser.add_argument("--no-retrain", action="store_true", help="Calculer l'importance sans réentraîner")
+    parser.add_argument("--seed", type=int, default=42, help="Graine des permutations et du réentraînement")
+    parser.add_argument("--results", default=os.path.join(MODELS_DIR, "question_importance.csv"))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    dataset, groups, results = compute_importances(
+        args.csv, args.weights, args.workers, args.threads_per_worker, args.repeats, args.seed
+    )
+    for r in results:
+        r["kept"] = r["importance"] > args.threshold
+    write_importances(results, args.results)
+
+    print(f"\n=== IMPORTANCE DES QUESTIONS ===")
+    print(f"{'Question':<28} {'Colonnes':>9} {'Importance':>11} {'Écart-type':>11}")
+    for r in results:
+        print(f"{r['question']:<28} {r['n_columns']:>9} {r['importance']:>11.4f} {r['importance_std']:>11.4f}"
+              f"{'' if r['kept'] else '  (retirée)'}")
+    print(f"Durée: {time.perf_counter() - start:.1f}s, classement écrit dans {args.results}")
+
+    kept = [r["question"] for r in results if r["kept"]]
+    removed = len(results) - len(kept)
+    if args.no_retrain or not removed:
+        if not removed:
+            print("Aucune question sous le seuil: pas de modèle réduit.")
+        return 0
+
+    from numpy_backend import NumpyDenseModel
+    _, X_test, _, y_test = test_split(dataset)
+    baseline = batched_accuracy(NumpyDenseModel.load(args.weights), np.asarray(X_test, dtype=np.float32), y_test)
+
+    print(f"\nRéentraînement sans {removed} questions...")
+    accuracy, n_columns = retrain_pruned(dataset, groups, kept, seed=args.seed)
+    print(f"\n=== MODÈLE RÉDUIT ({PRUNED_DIR}) ===")
+    print(f"Questions: {len(results)} -> {len(kept)}")
+    print(f"Colonnes: {len(dataset.feature_columns)} -> {n_columns}")
+    print(f"Accuracy test: {baseline:.4f} -> {accuracy:.4f} ({accuracy - baseline:+.4f})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
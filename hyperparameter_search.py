@@ -0,0 +1,194 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+import tempfile
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+# Espace de recherche par défaut (l'architecture actuelle en fait partie)
+DEFAULT_SPACE = {
+    "units": [[256, 128], [128, 64], [512, 256], [256]],
+    "dropout": [[0.3, 0.2], [0.5, 0.3], [0.2, 0.1]],
+    "learning_rate": [0.001, 0.0005],
+    "batch_size": [32, 64],
+    "patience": [5, 10]
+}
+
+def grid_candidates(space):
+    """Toutes les combinaisons de l'espace"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+def random_candidates(space, n_iter, seed=42):
+    """n_iter combinaisons tirées au hasard (sans doublon)"""
+    grid = grid_candidates(space)
+    return random.Random(seed).sample(grid, min(n_iter, len(grid)))
+
+def init_worker(threads):
+    """Limite les threads de calcul de chaque processus avant l'import de TensorFlow"""
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def evaluate_candidate(index, params, csv_path, output_dir, latency_rows=200):
+    """Entraîne un candidat, renvoie ses métriques et le chemin de son modèle"""
+    import numpy as np
+    from sklearn.model_selection import train_test_split
+    from tensorflow.keras.callbacks import EarlyStopping
+    from train_orientation_model import build_model
+    from training_data import load_encoded_dataset
+
+    dataset = load_encoded_dataset(csv_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        np.asarray(dataset.X), np.asarray(dataset.y), test_size=0.2, random_state=42
+    )
+
+    units = params["units"]
+    dropout = (list(params["dropout"]) + [params["dropout"][-1]] * len(units))[:len(units)]
+    model = build_model(
+        X_train.shape[1], len(dataset.label_encoder.classes_),
+        units=units, dropout=dropout, learning_rate=params["learning_rate"]
+    )
+
+    start = time.perf_counter()
+    history = model.fit(
+        X_train, y_train,
+        validation_split=0.2,
+        epochs=100,
+        batch_size=params["batch_size"],
+        callbacks=[EarlyStopping(monitor='val_loss', patience=params["patience"], restore_best_weights=True)],
+        verbose=0
+    )
+    train_time = time.perf_counter() - start
+
+    # Époque retenue par EarlyStopping (meilleure val_loss)
+    best_epoch = int(np.argmin(history.history['val_loss']))
+    test_accuracy = float(np.mean(np.argmax(model(X_test, training=False).numpy(), axis=1) == y_test))
+
+    rows = X_test[:latency_rows]
+    model(rows[:1], training=False)
+    start = time.perf_counter()
+    for i in range(len(rows)):
+        model(rows[i:i + 1], training=False)
+    latency_ms = (time.perf_counter() - start) * 1000 / max(len(rows), 1)
+
+    model_path = os.path.join(output_dir, f"candidate_{index}.h5")
+    model.save(model_path, save_format="h5")
+    return {
+        "index": index,
+        "params": params,
+        "val_accuracy": float(history.history['val_accuracy'][best_epoch]),
+        "test_accuracy": test_accuracy,
+        "epochs": len(history.history['loss']),
+        "train_time_s": train_time,
+        "latency_ms": latency_ms,
+        "model_path": model_path,
+        "history": history.history
+    }
+
+def write_results(results, path):
+    """Écrit le tableau classé des résultats en CSV"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["rang", "val_accuracy", "test_accuracy", "epochs", "train_time_s", "latency_ms", "params"])
+        for rank, r in enumerate(results, 1):
+            writer.writerow([
+                rank, f"{r['val_accuracy']:.4f}", f"{r['test_accuracy']:.4f}", r["epochs"],
+                f"{r['train_time_s']:.1f}", f"{r['latency_ms']:.3f}", json.dumps(r["params"])
+            ])
+
+def run_search(candidates, csv_path, workers, threads_per_worker, results_path):
+    """Entraîne les candidats dans un pool de processus et sauvegarde le meilleur"""
+    from training_data import load_encoded_dataset
+
+    # Encodage une seule fois avant de lancer les processus (ils liront le cache)
+    dataset = load_encoded_dataset(csv_path)
+    print(f"{len(candidates)} candidats, {workers} processus x {threads_per_worker} threads")
+
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(threads_per_worker,)
+        ) as executor:
+            futures = [
+                executor.submit(evaluate_candidate, i, params, csv_path, output_dir)
+                for i, params in enumerate(candidates)
+            ]
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Candidat en échec: {e}")
+                    continue
+                results.append(result)
+                print(f"[{len(results)}/{len(candidates)}] val_acc={result['val_accuracy']:.4f} "
+                      f"({result['train_time_s']:.1f}s) {json.dumps(result['params'])}")
+
+        if not results:
+            print("Aucun candidat n'a pu être entraîné.")
+            return []
+
+        results.sort(key=lambda r: (-r["val_accuracy"], r["latency_ms"]))
+        write_results(results, results_path)
+
+        print(f"\n=== CLASSEMENT ===")
+        print(f"{'Rang':<5} {'Val acc':>8} {'Test acc':>9} {'Temps (s)':>10} {'Latence (ms)':>13}  Paramètres")
+        for rank, r in enumerate(results, 1):
+            print(f"{rank:<5} {r['val_accuracy']:>8.4f} {r['test_accuracy']:>9.4f} "
+                  f"{r['train_time_s']:>10.1f} {r['latency_ms']:>13.3f}  {json.dumps(r['params'])}")
+
+        # Le meilleur modèle est sauvegardé là où ModelLoader l'attend
+        from tensorflow.keras.models import load_model
+        from train_orientation_model import save_artifacts
+        best = results[0]
+        save_artifacts(
+            load_model(best["model_path"], compile=False),
+            dataset.label_encoder,
+            dataset.feature_columns,
+            types.SimpleNamespace(history=best["history"])
+        )
+        print(f"Meilleur candidat sauvegardé: {json.dumps(best['params'])}")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres en parallèle")
+    parser.add_argument("--csv", default="ressources/data/dataset_orientation.csv")
+    parser.add_argument("--space", default=None, help="Fichier JSON {paramètre: [valeurs]} (sinon espace par défaut)")
+    parser.add_argument("--mode", choices=["grid", "random"], default="random")
+    parser.add_argument("--n-iter", type=int, default=12, help="Nombre de candidats en mode random")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut: cœurs / threads)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="Threads intra-op par processus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--results", default="ressources/models/hyperparameter_search.csv")
+    args = parser.parse_args(argv)
+
+    space = dict(DEFAULT_SPACE)
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space.update(json.load(f))
+
+    if args.mode == "grid":
+        candidates = grid_candidates(space)
+    else:
+        candidates = random_candidates(space, args.n_iter, args.seed)
+
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads_per_worker)
+    results = run_search(candidates, args.csv, workers, args.threads_per_worker, args.results)
+    return 0 if results else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import joblib
+from sklearn.model_selection import train_test_split
+from tensorflow.keras.models import load_model
+from tensorflow.keras.optimizers import Adam
+from database import StudentDatabase
+from preprocessing import AnswerEncoder
+from training_data import load_encoded_dataset
+from train_orientation_model import save_artifacts
+
+MODELS_DIR = "ressources/models"
+WATERMARK_PATH = os.path.join(MODELS_DIR, "training_watermark.json")
+
+def load_watermark(path=WATERMARK_PATH):
+    """Return the last student_responses id already used for training (0 if none)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return int(json.load(f).get("last_response_id", 0))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+
+def save_watermark(last_response_id, version, path=WATERMARK_PATH):
+    """Write the watermark atomically, only once the new model has been promoted"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"last_response_id": last_response_id, "version": version}, f)
+    os.replace(tmp_path, path)
+
+def export_new_rows(db, encoder, label_encoder, after_id):
+    """Encode the validated responses added after ``after_id``, return (X, y, last id seen, skipped)"""
+    classes = {name: i for i, name in enumerate(label_encoder.classes_)}
+    answers, labels, last_id, skipped = [], [], after_id, 0
+    for response_id, row_answers, domaine in db.get_validated_responses(after_id):
+        last_id = response_id
+        if row_answers is None or domaine not in classes:
+            # No detailed answers, or a domain the model has no output for (needs a full retrain)
+            skipped += 1
+            continue
+        answers.append(row_answers)
+        labels.append(classes[domaine])
+    return encoder.encode_batch(answers), np.array(labels, dtype=np.int32), last_id, skipped
+
+def replay_sample(csv_path, feature_columns, label_encoder, n_rows, seed=42):
+    """Sample of the original training split to replay, plus the original test split"""
+    dataset = load_encoded_dataset(csv_path)
+    if dataset.feature_columns != list(feature_columns):
+        raise ValueError("Les colonnes du jeu de données ne correspondent plus à celles du modèle")
+
+    # Align the dataset classes with the deployed model's classes by name
+    mapping = {name: i for i, name in enumerate(label_encoder.classes_)}
+    y = np.array([mapping.get(name, -1) for name in dataset.label_encoder.classes_])[np.asarray(dataset.y)]
+    X = np.asarray(dataset.X)
+    known = y >= 0
+
+    X_train, X_test, y_train, y_test = train_test_split(X[known], y[known], test_size=0.2, random_state=42)
+    rng = np.random.default_rng(seed)
+    index = rng.choice(len(y_train), size=min(n_rows, len(y_train)), replace=False)
+    return X_train[index], y_train[index], X_test, y_test
+
+def accuracy(model, X, y):
+    return float(np.mean(np.argmax(model(X, training=False).numpy(), axis=1) == y))
+
+def fine_tune(db_path=None, csv_path="ressources/data/dataset_orientation.csv", epochs=5, replay_ratio=2.0,
+              learning_rate=1e-4, min_rows=20, tolerance=0.0, seed=42):
+    """Fine-tune the deployed model on newly validated responses, promote it only if validation does not regress"""
+    start = time.perf_counter()
+    model = load_model(os.path.join(MODELS_DIR, "orientation_deep_model.h5"), compile=False)
+    label_encoder = joblib.load(os.path.join(MODELS_DIR, "nn_label_encoder.pkl"))
+    feature_columns = joblib.load(os.path.join(MODELS_DIR, "nn_feature_columns.pkl"))
+    encoder = AnswerEncoder(feature_columns)
+
+    # 1. Nouvelles lignes depuis le dernier entraînement
+    db = StudentDatabase(db_path)
+    watermark = load_watermark()
+    X_new, y_new, last_id, skipped = export_new_rows(db, encoder, label_encoder, watermark)
+    print(f"{len(y_new)} nouvelles réponses validées depuis la réponse {watermark} ({skipped} ignorées)")
+    if len(y_new) < min_rows:
+        print(f"Moins de {min_rows} nouvelles lignes: rien à faire.")
+        return False
+
+    # 2. Validation: une partie des nouvelles lignes + la partie test d'origine
+    X_new_train, X_new_val, y_new_train, y_new_val = train_test_split(
+        X_new, y_new, test_size=0.2, random_state=seed
+    )
+    X_replay, y_replay, X_old_val, y_old_val = replay_sample(
+        csv_path, feature_columns, label_encoder, int(len(y_new_train) * replay_ratio), seed
+    )
+    X_val = np.concatenate([X_new_val, X_old_val])
+    y_val = np.concatenate([y_new_val, y_old_val])
+    baseline = accuracy(model, X_val, y_val)
+
+    # 3. Quelques époques à partir des poids déployés, avec rejeu des anciennes données
+    X_train = np.concatenate([X_new_train, X_replay])
+    y_train = np.concatenate([y_new_train, y_replay])
+    model.compile(
+        loss='sparse_categorical_crossentropy',
+        optimizer=Adam(learning_rate=learning_rate),
+        metrics=['accuracy']
+    )
+    history = model.fit(
+        X_train, y_train, validation_data=(X_val, y_val),
+        epochs=epochs, batch_size=32, shuffle=True, verbose=1
+    )
+    tuned = accuracy(model, X_val, y_val)
+    print(f"Accuracy validation: {baseline:.4f} -> {tuned:.4f} ({time.perf_counter() - start:.1f}s)")
+
+    # 4. Nouvel artefact versionné seulement si la validation ne régresse pas
+    if tuned + tolerance < baseline:
+        print("Régression sur la validation: le modèle déployé est conservé.")
+        return False
+
+    # Copie versionnée complète (.h5, .npz, variantes, historique de l'affinage),
+    # puis artefacts déployés; l'historique de l'entraînement complet y est conservé
+    version = time.strftime("%Y%m%d-%H%M%S")
+    save_artifacts(model, label_encoder, feature_columns, history, os.path.join(MODELS_DIR, "versions", version))
+    save_artifacts(model, label_encoder, feature_columns, None, MODELS_DIR)
+    save_watermark(last_id, version)
+    print(f"Modèle {version} publié (jusqu'à la réponse {last_id})")
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Affinage incrémental à partir des nouvelles réponses validées")
+    parser.add_argument("--db", default=None, help="Chemin de students.db (par défaut: ressources/data/students.db)")
+    parser.add_argument("--csv", default="ressources/data/dataset_orientation.csv", help="Données d'origine (rejeu)")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--replay-ratio", type=float, default=2.0, help="Anciennes lignes rejouées par nouvelle ligne")
+    parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--min-rows", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Baisse d'accuracy acceptée")
+    args = parser.parse_args(argv)
+
+    fine_tune(args.db, args.csv, args.epochs, args.replay_ratio, args.learning_rate, args.min_rows, args.tolerance)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
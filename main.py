@@ -8,6 +8,7 @@ from login import LoginDialog
 from student_interface import StudentInterface
 from advisor_interface import AdvisorDashboard
 from server import app as flask_app
+from models import model_registry
 
 # Add global exception handler
 def exception_handler(exc_type, exc_value, exc_traceback):
@@ -70,6 +71,9 @@ class OrientationApp:
         self.login_dialog = None
         self.interface = None
         
+        # Load and warm up the model while the login dialog is on screen
+        model_registry.preload()
+
         # Start the server in a background thread (without opening browser)
         self.start_server()
         self.show_login()
@@ -1,10 +1,15 @@
 import os
+import gc
 import joblib
 import logging
 import numpy as np
-import pandas as pd
 import sys
-from PyQt5.QtWidgets import QMessageBox
+import threading
+import hashlib
+import atexit
+from preprocessing import AnswerEncoder
+from numpy_backend import NumpyDenseModel, variant_path
+from prediction_cache import PredictionCache
 
 # Set up logging to file to capture errors
 logging.basicConfig(
@@ -13,12 +18,23 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-try:
-    from tensorflow.keras.models import load_model
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
-    logging.warning("TensorFlow not available")
+# Inference backend: "auto" (TensorFlow when installed, NumPy otherwise),
+# "tensorflow" or "numpy". With "numpy" TensorFlow is never imported.
+INFERENCE_BACKEND = os.environ.get("ORIENTATION_BACKEND", "auto").strip().lower()
+
+# Weight precision: "float32" (default), or the "float16" / "int8" variants
+# exported by the training script. Reduced-precision variants run on NumPy.
+MODEL_VARIANT = os.environ.get("ORIENTATION_MODEL_VARIANT", "float32").strip().lower()
+if MODEL_VARIANT != "float32":
+    INFERENCE_BACKEND = "numpy"
+
+TENSORFLOW_AVAILABLE = False
+if INFERENCE_BACKEND != "numpy":
+    try:
+        from tensorflow.keras.models import load_model
+        TENSORFLOW_AVAILABLE = True
+    except ImportError:
+        logging.warning("TensorFlow not available, using the NumPy backend")
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -30,13 +46,29 @@ def resource_path(relative_path):
     
     return os.path.join(base_path, relative_path)
 
+def artifact_version(paths):
+    """Short content hash identifying a set of model artifact files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
 class ModelLoader:
-    def __init__(self):
+    def __init__(self, backend=None, cache=None, variant=None):
+        self.variant = (variant or MODEL_VARIANT).lower()
+        self.backend = "numpy" if self.variant != "float32" else (backend or INFERENCE_BACKEND).lower()
+        self.cache = cache
+        self.model_version = None
         self.use_tensorflow = False
         self.use_demo_mode = False
+        # Set when the artifacts load but cannot be used as-is (no demo fallback then)
+        self.load_error = None
         self.model = None
         self.label_encoder = None
         self.feature_columns = []
+        self.encoder = None
         
         # Initialize the method properly
         self.load_models = self._load_models  # Assign the method to the instance
@@ -48,19 +80,25 @@ class ModelLoader:
             # Use resource_path to get the correct path for models
             model_paths = {
                 'model': resource_path("ressources/models/orientation_deep_model.h5"),
+                'weights': variant_path(resource_path("ressources/models/orientation_deep_model.npz"), self.variant),
                 'encoder': resource_path("ressources/models/nn_label_encoder.pkl"),
                 'features': resource_path("ressources/models/nn_feature_columns.pkl")
             }
 
-            # Check if files exist
-            missing_files = [name for name, path in model_paths.items() if not os.path.exists(path)]
+            if self.backend == "tensorflow" and not TENSORFLOW_AVAILABLE:
+                raise ImportError("TensorFlow backend requested but TensorFlow is not available")
+            use_tensorflow = TENSORFLOW_AVAILABLE and self.backend != "numpy"
+
+            # Check if files exist (only the weights of the selected backend are needed)
+            required = ['model' if use_tensorflow else 'weights', 'encoder', 'features']
+            missing_files = [name for name in required if not os.path.exists(model_paths[name])]
 
             if missing_files:
                 error_msg = f"Missing model files: {', '.join(missing_files)}"
                 logging.error(error_msg)
                 raise FileNotFoundError(error_msg)
 
-            if TENSORFLOW_AVAILABLE:
+            if use_tensorflow:
                 logging.info("Loading TensorFlow model...")
                 try:
                     # Add TensorFlow compatibility settings
@@ -75,10 +113,26 @@ class ModelLoader:
                     logging.error(f"Error loading TensorFlow model: {str(e)}")
                     # Try to fall back to a different approach if available
                     raise
+            else:
+                self.model = NumpyDenseModel.load(model_paths['weights'])
+                logging.info(f"NumPy model loaded successfully ({self.variant})")
 
             # Load other models
             self.label_encoder = joblib.load(model_paths['encoder'])
             self.feature_columns = joblib.load(model_paths['features'])
+
+            # Compile the answer encoder now so a questionnaire/training
+            # mismatch is reported at load time instead of encoding zeros.
+            # Wrong recommendations are worse than none: this is not a demo case.
+            try:
+                self.encoder = AnswerEncoder(self.feature_columns)
+            except ValueError as e:
+                self.load_error = f"Questionnaire does not match the trained model: {str(e)}"
+                logging.critical(self.load_error)
+                print(f"Model unusable: {self.load_error}")
+                return
+
+            self.model_version = artifact_version(model_paths[name] for name in required)
             logging.info("All model files loaded successfully.")
 
         except Exception as e:
@@ -87,35 +141,173 @@ class ModelLoader:
             # Don't show message box during initialization to avoid GUI issues
             print(f"Model loading failed: {str(e)}. Using demo mode.")
 
+    def predict_proba(self, X):
+        """Return the class probabilities for an encoded feature matrix."""
+        if self.use_tensorflow:
+            # Direct call: one forward pass, without model.predict's per-call
+            # dataset setup and internal 32-row batching
+            return self.model(X, training=False).numpy()
+        # NumPy backend (or any model exposing a scikit-learn style predict_proba)
+        return self.model.predict_proba(X)
+
+    def _predict_proba_cached(self, X):
+        """predict_proba that only runs inference for rows missing from the cache."""
+        if self.cache is None:
+            return self.predict_proba(X)
+
+        # Keyed by this loader's version, not the cache's: a loader being
+        # replaced by reload() can never read or write the new model's entries
+        keys = [self.cache.key(row, self.model_version) for row in X]
+        cached = [self.cache.get(key) for key in keys]
+        missing = [i for i, value in enumerate(cached) if value is None]
+        if not missing:
+            return np.stack(cached)
+
+        computed = self.predict_proba(X[missing])
+        for i, row in zip(missing, computed):
+            # A copy, so the entry does not keep the whole batch array alive
+            cached[i] = row.copy()
+            self.cache.put(keys[i], cached[i])
+        return np.stack(cached)
+
+    def predict_batch(self, rows, batch_size=256):
+        """Score many answer dicts with one forward pass per chunk.
+
+        Returns ``(class_ids, labels, probabilities)`` as arrays aligned
+        with the input rows.
+        """
+        if self.load_error:
+            raise RuntimeError(self.load_error)
+        if self.use_demo_mode:
+            raise RuntimeError("Model not loaded, predictions unavailable in demo mode")
+
+        rows = list(rows)
+        n_classes = len(self.label_encoder.classes_)
+        probabilities = np.empty((len(rows), n_classes), dtype=np.float32)
+        buffer = np.zeros((min(batch_size, len(rows)), self.encoder.n_features), dtype=np.float32)
+
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            X = self.encoder.encode_batch(chunk, out=buffer)
+            probabilities[start:start + len(chunk)] = self._predict_proba_cached(X)
+
+        class_ids = np.argmax(probabilities, axis=1)
+        labels = self.label_encoder.inverse_transform(class_ids)
+        return class_ids, labels, probabilities
+
+    def warm_up(self):
+        """Run a dummy inference so the first real prediction is not a cold start."""
+        if self.use_demo_mode or self.load_error:
+            return
+        try:
+            self.predict_batch([{}])
+        except Exception as e:
+            logging.error(f"Model warm-up failed: {str(e)}")
+
     def predict(self, data):
         """Make predictions using the loaded model."""
+        if self.load_error:
+            raise RuntimeError(self.load_error)
         if self.use_demo_mode:
             return "informatique / ingénierie", 85.0
         
         try:
-            df = pd.DataFrame([data])
-            X = pd.get_dummies(df)
-
-            # Ensure we have all expected features
-            missing_cols = set(self.feature_columns) - set(X.columns)
-            for col in missing_cols:
-                X[col] = 0
-            X = X[self.feature_columns]
-
-            if self.use_tensorflow:
-                pred_proba = self.model.predict(X.values.astype(np.float32))
-                pred_class = np.argmax(pred_proba, axis=1)
-                domaine = self.label_encoder.inverse_transform(pred_class)[0]
-                confidence = np.max(pred_proba) * 100
-            else:
-                # Fallback if TensorFlow model didn't load but other models did
-                pred_proba = self.model.predict_proba(X)
-                pred_class = self.model.predict(X)
-                domaine = self.label_encoder.inverse_transform(pred_class)[0]
-                confidence = np.max(pred_proba) * 100
+            _, labels, probabilities = self.predict_batch([data])
+            domaine = labels[0]
+            confidence = np.max(probabilities[0]) * 100
 
             return domaine, confidence
         
         except Exception as e:
             logging.error(f"Prediction error: {str(e)}")
-            return "informatique / ingénierie", 85.0  # Fallback to demo mode
\ No newline at end of file
+            return "informatique / ingénierie", 85.0  # Fallback to demo mode
+
+
+class ModelRegistry:
+    """Process-wide shared ModelLoader, loaded lazily on first use.
+
+    The GUI and the Flask server share the same instance so the model
+    artifacts are read from disk once per process instead of once per login.
+    """
+
+    def __init__(self, factory=ModelLoader, cache=None):
+        self._factory = factory
+        # The prediction cache outlives reloads; it is invalidated by model version
+        self.cache = cache
+        self._loader = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._preload_thread = None
+
+    @property
+    def is_loaded(self):
+        return self._loader is not None
+
+    def _ensure_loaded(self, warm_up):
+        loader = self._loader
+        if loader is None:
+            with self._lock:
+                if self._loader is None:
+                    loader = self._factory(cache=self.cache)
+                    if warm_up:
+                        loader.warm_up()
+                    self._swap(loader)
+                    self._ready.set()
+                loader = self._loader
+        return loader
+
+    def _swap(self, loader):
+        """Install ``loader`` as the shared model; must be called with ``_lock`` held."""
+        if self.cache is not None and loader.model_version is not None:
+            self.cache.bind(loader.model_version)
+        self._loader = loader
+
+    def current(self):
+        """Return the shared ModelLoader if it is loaded, None otherwise (never loads it)."""
+        return self._loader
+
+    def get(self):
+        """Return the shared ModelLoader, loading it on first call."""
+        return self._ensure_loaded(warm_up=False)
+
+    def preload(self, warm_up=True):
+        """Load and warm up the model on a background thread (no-op if already running)."""
+        if self._preload_thread is not None and self._preload_thread.is_alive():
+            return self._preload_thread
+
+        def run():
+            try:
+                self._ensure_loaded(warm_up)
+            except Exception as e:
+                logging.error(f"Model preload failed: {str(e)}")
+
+        self._preload_thread = threading.Thread(target=run, name="model-preload", daemon=True)
+        self._preload_thread.start()
+        return self._preload_thread
+
+    def wait_until_ready(self, timeout=None):
+        """Block until a model is loaded (and warmed up when preloading). Returns False on timeout."""
+        return self._ready.wait(timeout)
+
+    def reload(self):
+        """Load the artifacts again (e.g. after retraining) and swap them in."""
+        with self._lock:
+            # Callers keep using the previous model until the new one is ready
+            loader = self._factory(cache=self.cache)
+            loader.warm_up()
+            self._swap(loader)
+            self._ready.set()
+            return loader
+
+    def unload(self):
+        """Drop the shared model so its memory can be reclaimed."""
+        with self._lock:
+            self._loader = None
+            self._ready.clear()
+        if self.cache is not None:
+            self.cache.save()
+        gc.collect()
+
+model_registry = ModelRegistry(cache=PredictionCache.from_env())
+if model_registry.cache is not None:
+    atexit.register(model_registry.cache.save)
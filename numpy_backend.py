@@ -0,0 +1,137 @@
+import os
+import sys
+import logging
+import numpy as np
+
+def _relu(x):
+    return np.maximum(x, 0.0, out=x)
+
+def _softmax(x):
+    x = x - np.max(x, axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= np.sum(x, axis=1, keepdims=True)
+    return x
+
+def _linear(x):
+    return x
+
+ACTIVATIONS = {
+    "relu": _relu,
+    "softmax": _softmax,
+    "linear": _linear,
+}
+
+# Layers that are the identity at inference time
+INFERENCE_NOOP_LAYERS = ("Dropout", "InputLayer")
+
+# Stored precision of the Dense kernels (biases always stay float32)
+PRECISIONS = ("float32", "float16", "int8")
+
+def variant_path(path, precision):
+    """orientation_deep_model.npz -> orientation_deep_model_<precision>.npz (float32 keeps the base name)"""
+    if precision == "float32":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{precision}{ext}"
+
+def quantize_int8(kernel):
+    """Symmetric per-layer int8 quantization, returns (int8 kernel, float32 scale)"""
+    scale = float(np.max(np.abs(kernel))) / 127.0 or 1.0
+    quantized = np.clip(np.round(kernel / scale), -127, 127).astype(np.int8)
+    return quantized, np.float32(scale)
+
+def export_dense_weights(model, path, precision="float32"):
+    """Write the Dense kernels, biases and activations of a Keras model to a .npz file"""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (expected one of {PRECISIONS})")
+
+    arrays = {}
+    activations = []
+    for layer in model.layers:
+        layer_type = layer.__class__.__name__
+        if layer_type in INFERENCE_NOOP_LAYERS:
+            continue
+        if layer_type != "Dense":
+            raise ValueError(f"Unsupported layer for NumPy export: {layer.name} ({layer_type})")
+
+        activation = layer.get_config()["activation"]
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation for NumPy export: {activation}")
+
+        kernel, bias = layer.get_weights()
+        index = len(activations)
+        if precision == "int8":
+            arrays[f"kernel_{index}"], arrays[f"scale_{index}"] = quantize_int8(kernel)
+        else:
+            arrays[f"kernel_{index}"] = kernel.astype(precision)
+        arrays[f"bias_{index}"] = bias.astype(np.float32)
+        activations.append(activation)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez_compressed(path, activations=np.array(activations), precision=np.array(precision), **arrays)
+    logging.info(f"Exported {len(activations)} Dense layers to {path} ({precision})")
+
+class NumpyDenseModel:
+    """Forward pass of an exported Dense network using NumPy only"""
+
+    def __init__(self, layers):
+        # layers: list of (kernel, bias, activation name)
+        self.layers = [(kernel, bias, ACTIVATIONS[activation]) for kernel, bias, activation in layers]
+        self.input_dim = self.layers[0][0].shape[0]
+        self.output_dim = self.layers[-1][0].shape[1]
+
+    @classmethod
+    def load(cls, path):
+        """Load an exported network; reduced-precision kernels are dequantized to float32 once here"""
+        with np.load(path, allow_pickle=False) as data:
+            activations = [str(name) for name in data["activations"]]
+            layers = []
+            for i, activation in enumerate(activations):
+                kernel = data[f"kernel_{i}"].astype(np.float32)
+                if f"scale_{i}" in data:
+                    kernel *= data[f"scale_{i}"]
+                layers.append((kernel, data[f"bias_{i}"], activation))
+        return cls(layers)
+
+    def predict_proba(self, X):
+        """Return the output probabilities for a (n_rows, input_dim) matrix"""
+        x = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = activation(x @ kernel + bias)
+        return x
+
+def check_parity(keras_model, numpy_model, n_samples=256, atol=1e-5, seed=0):
+    """Compare both backends on random one-hot style inputs, return the max abs difference"""
+    rng = np.random.default_rng(seed)
+    X = (rng.random((n_samples, numpy_model.input_dim)) < 0.05).astype(np.float32)
+    expected = keras_model(X, training=False).numpy()
+    actual = numpy_model.predict_proba(X)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > atol:
+        raise ValueError(f"NumPy backend differs from Keras model: max |diff| = {max_diff:.2e} > {atol:.0e}")
+    return max_diff
+
+def export_and_verify(keras_model, path, atol=1e-5):
+    """Export the weights then check that the NumPy forward pass matches Keras"""
+    export_dense_weights(keras_model, path)
+    return check_parity(keras_model, NumpyDenseModel.load(path), atol=atol)
+
+def export_quantized_variants(keras_model, path, precisions=("float16", "int8")):
+    """Export reduced-precision copies next to ``path``, return {precision: file path}"""
+    paths = {}
+    for precision in precisions:
+        paths[precision] = variant_path(path, precision)
+        export_dense_weights(keras_model, paths[precision], precision=precision)
+    return paths
+
+if __name__ == "__main__":
+    from tensorflow.keras.models import load_model
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "ressources/models/orientation_deep_model.h5"
+    weights_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(model_path)[0] + ".npz"
+
+    keras_model = load_model(model_path, compile=False)
+    max_diff = export_and_verify(keras_model, weights_path)
+    print(f"Poids exportés vers {weights_path} (écart max avec Keras: {max_diff:.2e})")
+    for precision, path in export_quantized_variants(keras_model, weights_path).items():
+        print(f"Variante {precision} exportée vers {path}")
@@ -0,0 +1,114 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import joblib
+
+class PredictionCache:
+    """Bounded LRU cache of probability rows keyed by the encoded answer vector.
+
+    Keys combine the model version with the bytes of the float32 feature
+    vector, so identical questionnaire profiles skip inference entirely and
+    entries computed by another model can never be served. Binding a new
+    model version drops every entry.
+    """
+
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.model_version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path:
+            self.load()
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from ORIENTATION_CACHE_SIZE / ORIENTATION_CACHE_PATH (size 0 disables it)"""
+        try:
+            maxsize = int(os.environ.get("ORIENTATION_CACHE_SIZE", "4096"))
+        except ValueError:
+            # Imported at startup by the GUI and the server: a typo must not stop them
+            logging.error(f"Invalid ORIENTATION_CACHE_SIZE {os.environ['ORIENTATION_CACHE_SIZE']!r}, using 4096")
+            maxsize = 4096
+        if maxsize <= 0:
+            return None
+        return cls(maxsize=maxsize, path=os.environ.get("ORIENTATION_CACHE_PATH") or None)
+
+    def key(self, vector, model_version):
+        """Key of ``vector`` as scored by the model ``model_version`` (the caller's, not the bound one)"""
+        digest = hashlib.blake2b(vector.tobytes(), digest_size=16)
+        digest.update(str(model_version).encode("utf-8"))
+        return digest.digest()
+
+    def bind(self, model_version):
+        """Attach the cache to a model version, invalidating entries of any other version"""
+        with self._lock:
+            if model_version != self.model_version:
+                if self._entries:
+                    logging.info(f"Prediction cache invalidated ({self.model_version} -> {model_version})")
+                self._entries.clear()
+                self.model_version = model_version
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "model_version": self.model_version
+            }
+
+    def save(self):
+        """Persist the entries to ``path`` so they survive a restart"""
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                state = {"model_version": self.model_version, "entries": list(self._entries.items())}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            joblib.dump(state, self.path)
+        except Exception as e:
+            logging.error(f"Failed to save prediction cache: {str(e)}")
+
+    def load(self):
+        """Restore persisted entries; they are dropped by bind() if the model changed since"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            state = joblib.load(self.path)
+            with self._lock:
+                self.model_version = state["model_version"]
+                self._entries = OrderedDict(state["entries"][-self.maxsize:])
+        except Exception as e:
+            logging.error(f"Failed to load prediction cache: {str(e)}")
@@ -0,0 +1,168 @@
+import unicodedata
+import numpy as np
+import pandas as pd
+from questions import QUESTIONS
+
+# Typographic apostrophes found in the survey export headers and answers
+_APOSTROPHES = str.maketrans({
+    "’": "'",
+    "‘": "'",
+    "ʼ": "'",
+})
+
+# Separator used to join the selected options of a checkbox question
+CHECKBOX_SEPARATOR = ", "
+
+# Bump whenever encode_features changes, so cached encoded datasets are rebuilt
+PREPROCESSING_VERSION = 2
+
+def normalize_text(text):
+    """Normalize a question or option label (unicode form, apostrophes, spaces)"""
+    return unicodedata.normalize("NFC", str(text)).translate(_APOSTROPHES).strip()
+
+def split_checkbox_answer(value):
+    """'Sports, Lecture' -> ['Sports', 'Lecture'] (missing answers give an empty list)"""
+    if not isinstance(value, str) or not value:
+        return []
+    return [part for part in value.split(CHECKBOX_SEPARATOR) if part]
+
+def expand_checkbox_answers(df, questions=QUESTIONS, prefix_sep="_"):
+    """Replace each checkbox column of a survey DataFrame by one multi-hot column per option.
+
+    Column names follow the ``pd.get_dummies`` layout (``<question>_<option>``)
+    so the result can go through ``pd.get_dummies`` for the remaining questions.
+    """
+    columns = {normalize_text(column): column for column in df.columns}
+    expanded = {}
+    for q_data in questions.values():
+        if q_data["type"] != "checkbox":
+            continue
+        column = columns.get(normalize_text(q_data["text"]))
+        if column is None:
+            continue
+
+        selected = df[column].map(lambda value: {normalize_text(part) for part in split_checkbox_answer(value)})
+        for option in q_data["options"]:
+            key = normalize_text(option)
+            expanded[f"{column}{prefix_sep}{option}"] = selected.map(lambda parts: key in parts).astype(np.uint8)
+        df = df.drop(columns=[column])
+
+    return pd.concat([df, pd.DataFrame(expanded, index=df.index)], axis=1)
+
+def encode_features(X, questions=QUESTIONS):
+    """Training-side encoding: multi-hot checkbox options, one-hot for the other questions"""
+    return pd.get_dummies(expand_checkbox_answers(X, questions)).astype(np.float32)
+
+class AnswerEncoder:
+    """One-hot / multi-hot encoder compiled once from the training feature columns.
+
+    Produces exactly what the training encoding produced for a row, but maps
+    each (question, option) pair straight to its column index and writes into
+    a float32 vector. Checkbox questions are multi-hot (one column per option)
+    unless the columns come from an older model trained on whole option
+    combinations, in which case the joined answer is matched as one category.
+    """
+
+    def __init__(self, feature_columns, questions=QUESTIONS, prefix_sep="_"):
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+        self.questions = questions
+
+        # normalized question text -> {normalized option: column index}
+        self._columns = {normalize_text(q["text"]): {} for q in questions.values()}
+        unmatched = []
+        for index, column in enumerate(self.feature_columns):
+            question, sep, option = str(column).partition(prefix_sep)
+            options = self._columns.get(normalize_text(question)) if sep else None
+            if options is None:
+                unmatched.append(column)
+                continue
+            options[normalize_text(option)] = index
+
+        if unmatched:
+            raise ValueError(
+                f"{len(unmatched)} feature columns do not match any question "
+                f"in questions.QUESTIONS: {unmatched[:5]}"
+            )
+
+        missing = [
+            q_data["text"] for q_data in questions.values()
+            if q_data["type"] != "text" and not self._columns[normalize_text(q_data["text"])]
+        ]
+        if missing:
+            raise ValueError(
+                f"No feature columns found for questions: {missing}"
+            )
+
+        # Raw answer keys are resolved once, then served from this table:
+        # question text -> (options, multi_hot)
+        self._lookup = {}
+        for q_data in questions.values():
+            options = self._columns[normalize_text(q_data["text"])]
+            multi_hot = q_data["type"] == "checkbox" and not any(
+                CHECKBOX_SEPARATOR in option for option in options
+            )
+            self._lookup[q_data["text"]] = (options, multi_hot)
+        self._normalized_lookup = {normalize_text(text): entry for text, entry in self._lookup.items()}
+
+    def _entry_for(self, question):
+        entry = self._lookup.get(question)
+        if entry is None:
+            entry = self._normalized_lookup.get(normalize_text(question))
+            if entry is not None:
+                self._lookup[question] = entry
+        return entry
+
+    @staticmethod
+    def _option_index(options, value):
+        index = options.get(value)
+        if index is None:
+            index = options.get(normalize_text(value))
+        return index
+
+    def column_indices(self, question, value):
+        """Return the column indices set by an answer (options never seen in training are ignored)"""
+        entry = self._entry_for(question)
+        if entry is None or not isinstance(value, str):
+            return []
+        options, multi_hot = entry
+        parts = split_checkbox_answer(value) if multi_hot else [value]
+        indices = []
+        for part in parts:
+            index = self._option_index(options, part)
+            if index is not None:
+                indices.append(index)
+        return indices
+
+    def question_columns(self):
+        """Return {question id: [column indices]}, every column of each question"""
+        return {
+            q_id: sorted(self._columns[normalize_text(q_data["text"])].values())
+            for q_id, q_data in self.questions.items()
+        }
+
+    def encode(self, answers, out=None):
+        """Encode one answer dict {question text: option} into a float32 vector"""
+        if out is None:
+            out = np.zeros(self.n_features, dtype=np.float32)
+        else:
+            out.fill(0.0)
+
+        for question, value in answers.items():
+            out[self.column_indices(question, value)] = 1.0
+        return out
+
+    def encode_batch(self, rows, out=None):
+        """Encode a sequence of answer dicts into a (n_rows, n_features) float32 matrix"""
+        rows = list(rows)
+        if out is None:
+            out = np.zeros((len(rows), self.n_features), dtype=np.float32)
+        else:
+            out = out[:len(rows)]
+            out.fill(0.0)
+
+        for row_index, answers in enumerate(rows):
+            row = out[row_index]
+            for question, value in answers.items():
+                row[self.column_indices(question, value)] = 1.0
+        return out
@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import time
+import argparse
+from database import StudentDatabase
+from models import ModelLoader
+
+DEFAULT_CHECKPOINT = "ressources/data/rescore_checkpoint.json"
+
+def load_checkpoint(path, model_version):
+    """Return the last processed response id for this model version (0 if none)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    if checkpoint.get("model_version") != model_version:
+        return 0
+    return int(checkpoint.get("last_id", 0))
+
+def save_checkpoint(path, model_version, last_id, scored):
+    """Write the checkpoint atomically so an interruption never leaves it half-written"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "model_version": model_version,
+            "last_id": last_id,
+            "scored": scored,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }, f)
+    os.replace(tmp_path, path)
+
+def rescore(db, model_loader, chunk_size=1000, batch_size=256, checkpoint_path=DEFAULT_CHECKPOINT, restart=False):
+    """Recompute the prediction of every stored response with the current model"""
+    model_version = model_loader.model_version
+    last_id = 0 if restart else load_checkpoint(checkpoint_path, model_version)
+    if last_id:
+        print(f"Reprise après la réponse {last_id} (modèle {model_version})")
+
+    scored = skipped = 0
+    start = time.perf_counter()
+    for rows in db.iter_response_chunks(after_id=last_id, chunk_size=chunk_size):
+        ids, answers = [], []
+        for response_id, _, row_answers in rows:
+            if row_answers is None:
+                skipped += 1
+                continue
+            ids.append(response_id)
+            answers.append(row_answers)
+
+        if answers:
+            _, labels, probabilities = model_loader.predict_batch(answers, batch_size=batch_size)
+            confidences = probabilities.max(axis=1) * 100
+            predictions = [
+                (response_id, model_version, str(label), float(confidence))
+                for response_id, label, confidence in zip(ids, labels, confidences)
+            ]
+            if not db.save_response_predictions(predictions):
+                raise RuntimeError(f"Échec de l'écriture du lot se terminant à la réponse {rows[-1][0]}")
+            scored += len(predictions)
+
+        last_id = rows[-1][0]
+        save_checkpoint(checkpoint_path, model_version, last_id, scored)
+
+        elapsed = time.perf_counter() - start
+        print(f"{scored} réponses recalculées, {skipped} sans réponses détaillées "
+              f"({(scored + skipped) / max(elapsed, 1e-9):.0f} lignes/s)")
+
+    return scored, skipped
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recalcule les recommandations stockées avec le modèle actuel")
+    parser.add_argument("--db", default=None, help="Chemin de students.db (par défaut: ressources/data/students.db)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Réponses lues et écrites par transaction")
+    parser.add_argument("--batch-size", type=int, default=256, help="Lignes par passe du réseau")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Fichier de reprise")
+    parser.add_argument("--restart", action="store_true", help="Ignorer le point de reprise existant")
+    args = parser.parse_args(argv)
+
+    model_loader = ModelLoader()
+    if model_loader.use_demo_mode or model_loader.load_error:
+        print(f"Modèle indisponible: impossible de recalculer les recommandations. {model_loader.load_error or ''}")
+        return 1
+
+    db = StudentDatabase(args.db)
+    start = time.perf_counter()
+    scored, skipped = rescore(db, model_loader, args.chunk_size, args.batch_size, args.checkpoint, args.restart)
+    elapsed = time.perf_counter() - start
+    print(f"Terminé: {scored} réponses recalculées en {elapsed:.1f}s (modèle {model_loader.model_version})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,16 @@
 from flask import Flask, request, jsonify
-import json
 import logging
 from datetime import datetime
 from database import StudentDatabase
+from models import model_registry
+from batching import MicroBatcher
+from questions import QUESTIONS
+from preprocessing import normalize_text
 from flask_cors import CORS
 import time
 import sqlite3
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -15,7 +20,10 @@ app.config.update({
     'JSON_SORT_KEYS': False,
     'SQLITE_THREADSAFE': 1,
     'SQLITE_DB_TIMEOUT': 10,
-    'MAX_CONTENT_LENGTH': 16 * 1024 * 1024  # 16MB max request size
+    'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,  # 16MB max request size
+    'PREDICT_MAX_BATCH_SIZE': 64,  # flush /api/predict batch when this many requests wait
+    'PREDICT_MAX_LATENCY_MS': 5,  # ...or when the oldest request waited this long
+    'PREDICT_TIMEOUT': 30
 })
 
 # Initialize database with connection pooling
@@ -23,29 +31,21 @@ db = StudentDatabase()
 
 @app.before_request
 def before_request():
-    """Verify and maintain database connection before each request"""
-    try:
-        if not hasattr(db, 'conn') or not db.conn:
-            db.connect()
-        # Simple connection test
-        db.cursor.execute("SELECT 1")
-    except (sqlite3.Error, AttributeError) as e:
-        logging.error(f"Database connection check failed: {str(e)}")
-        try:
-            db.connect()  # Attempt to reconnect
-        except Exception as reconnect_error:
-            logging.critical(f"Database reconnection failed: {str(reconnect_error)}")
-            return jsonify({
-                "error": "Database unavailable",
-                "message": "Service temporarily unavailable"
-            }), 503
+    """Make sure the connection pool is available before each request"""
+    if not db._ensure_connection():
+        logging.critical("Database reconnection failed")
+        return jsonify({
+            "error": "Database unavailable",
+            "message": "Service temporarily unavailable"
+        }), 503
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Endpoint for service health monitoring"""
     try:
         # Check database connection
-        db.cursor.execute("SELECT 1")
+        with db.cursor() as cursor:
+            cursor.execute("SELECT 1")
         return jsonify({
             "status": "healthy",
             "timestamp": datetime.now().isoformat()
@@ -66,35 +66,24 @@ def get_students():
         query = '''
             SELECT s.student_id, s.full_name, s.class, 
                    c.class_code,
-                   COALESCE(r.response_data, '{}') as response_data,
-                   r.submission_date
+                   l.domaine, l.confidence, l.submission_date
             FROM students s
             LEFT JOIN classes c ON s.class = c.class_name
-            LEFT JOIN (
-                SELECT student_id, response_data, MAX(submission_date) as submission_date
-                FROM student_responses
-                GROUP BY student_id
-            ) r ON s.student_id = r.student_id
+            LEFT JOIN student_latest_response l ON s.student_id = l.student_id
             ORDER BY s.class, s.full_name
         '''
         
-        with db.conn:
-            db.cursor.execute(query)
-            for row in db.cursor.fetchall():
-                try:
-                    response = json.loads(row[4]) if row[4] else {}
-                except json.JSONDecodeError as je:
-                    logging.warning(f"Invalid JSON for student {row[0]}: {str(je)}")
-                    response = {}
-                
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            for row in cursor.fetchall():
                 students_data.append({
                     "ID": row[0],
                     "Nom complet": row[1],
                     "Classe": row[2],
                     "Code": row[3] if row[3] else "N/A",
-                    "Domaine": response.get("domaine", "Aucune réponse"),
-                    "Confiance": f"{response.get('confidence', 0):.1f}%",
-                    "Date": row[5].strftime("%Y-%m-%d %H:%M:%S") if row[5] else ""
+                    "Domaine": row[4] or "Aucune réponse",
+                    "Confiance": f"{row[5] or 0:.1f}%",
+                    "Date": row[6] or ""
                 })
 
         return jsonify(students_data), 200
@@ -121,33 +110,23 @@ def get_students_by_class(class_name):
         
         query = '''
             SELECT s.student_id, s.full_name, s.class,
-                   COALESCE(r.response_data, '{}') as response_data,
-                   r.submission_date
+                   l.domaine, l.confidence, l.submission_date
             FROM students s
-            LEFT JOIN (
-                SELECT student_id, response_data, MAX(submission_date) as submission_date
-                FROM student_responses
-                GROUP BY student_id
-            ) r ON s.student_id = r.student_id
+            LEFT JOIN student_latest_response l ON s.student_id = l.student_id
             WHERE s.class = ?
             ORDER BY s.full_name
         '''
         
-        with db.conn:
-            db.cursor.execute(query, (normalized_class_name,))
-            for row in db.cursor.fetchall():
-                try:
-                    response = json.loads(row[3]) if row[3] else {}
-                except json.JSONDecodeError:
-                    response = {}
-
+        with db.cursor() as cursor:
+            cursor.execute(query, (normalized_class_name,))
+            for row in cursor.fetchall():
                 students_data.append({
                     "ID": row[0],
                     "Nom complet": row[1],
                     "Classe": row[2],
-                    "Domaine": response.get("domaine", "Aucune réponse"),
-                    "Confiance": f"{response.get('confidence', 0):.1f}%",
-                    "Date": row[4].strftime("%Y-%m-%d %H:%M:%S") if row[4] else ""
+                    "Domaine": row[3] or "Aucune réponse",
+                    "Confiance": f"{row[4] or 0:.1f}%",
+                    "Date": row[5] or ""
                 })
 
         return jsonify(students_data), 200
@@ -211,6 +190,8 @@ def submit_response():
             "full_name": student_info[0],
             "class_name": student_info[1]
         }
+        if data.get("model_version"):
+            response_data["model_version"] = str(data["model_version"])
 
         # Save with retry logic
         for attempt in range(max_retries):
@@ -243,6 +224,93 @@ def submit_response():
             "request_id": request.headers.get('X-Request-ID', 'none')
         }), 500
 
+def _predict_rows(rows):
+    """Score a micro-batch of answer dicts with one forward pass"""
+    loader = model_registry.get()
+    _, labels, probabilities = loader.predict_batch(rows, batch_size=len(rows))
+    classes = loader.label_encoder.classes_
+    return [
+        {
+            "domaine": str(label),
+            "confidence": float(proba.max() * 100),
+            "probabilities": {str(c): float(p) for c, p in zip(classes, proba)},
+            "model_version": loader.model_version
+        }
+        for label, proba in zip(labels, probabilities)
+    ]
+
+# Question texts accepted as answer keys by /api/predict (normalized like the encoder does)
+QUESTION_TEXTS = {normalize_text(q["text"]) for q in QUESTIONS.values()}
+
+def invalid_answers(answers):
+    """Return (unknown keys, keys whose value is not a string) of an answers dict"""
+    unknown = [key for key in answers if normalize_text(key) not in QUESTION_TEXTS]
+    not_strings = [key for key, value in answers.items() if not isinstance(value, str)]
+    return unknown, not_strings
+
+_predict_batcher = None
+_predict_batcher_lock = threading.Lock()
+
+def get_predict_batcher():
+    """Create the shared micro-batcher on first use, from the current app config"""
+    global _predict_batcher
+    if _predict_batcher is None:
+        with _predict_batcher_lock:
+            if _predict_batcher is None:
+                _predict_batcher = MicroBatcher(
+                    _predict_rows,
+                    max_batch_size=app.config['PREDICT_MAX_BATCH_SIZE'],
+                    max_latency_ms=app.config['PREDICT_MAX_LATENCY_MS']
+                )
+    return _predict_batcher
+
+@app.route('/api/predict', methods=['POST'])
+def predict():
+    """Predict the orientation domain from questionnaire answers (micro-batched)"""
+    try:
+        if not request.is_json:
+            return jsonify({"error": "Request must be JSON"}), 400
+
+        data = request.get_json()
+        answers = data.get("answers") if isinstance(data, dict) else None
+        if not isinstance(answers, dict) or not answers:
+            return jsonify({"error": "Missing required field", "missing": ["answers"]}), 400
+
+        # Unknown keys or non-string values would be dropped by the encoder
+        # and scored as an empty questionnaire
+        unknown, not_strings = invalid_answers(answers)
+        if unknown or not_strings:
+            return jsonify({
+                "error": "Invalid answers",
+                "unknown_questions": unknown,
+                "non_string_values": not_strings,
+                "message": "Keys must be question texts from questions.QUESTIONS and values strings "
+                           "(checkbox options joined with ', ')"
+            }), 400
+
+        loader = model_registry.get()
+        if loader.load_error:
+            return jsonify({"error": "Model unusable", "message": loader.load_error}), 503
+        if loader.use_demo_mode:
+            return jsonify({
+                "error": "Model unavailable",
+                "message": "Service temporarily unavailable"
+            }), 503
+
+        result = get_predict_batcher().submit(answers).result(timeout=app.config['PREDICT_TIMEOUT'])
+        return jsonify(result), 200
+
+    except FutureTimeoutError:
+        logging.error("Prediction timed out")
+        return jsonify({"error": "Prediction timed out"}), 504
+    except Exception as e:
+        logging.error(f"Prediction error: {str(e)}", exc_info=True)
+        return jsonify({
+            "error": "Internal server error",
+            "message": str(e),
+            "request_id": request.headers.get('X-Request-ID', 'none')
+        }), 500
+
 @app.route('/api/classes', methods=['GET'])
 def get_classes():
     """Get all classes with student counts"""
@@ -258,9 +326,9 @@ def get_classes():
             ORDER BY c.class_name
         '''
         
-        with db.conn:
-            db.cursor.execute(query)
-            for row in db.cursor.fetchall():
+        with db.cursor() as cursor:
+            cursor.execute(query)
+            for row in cursor.fetchall():
                 classes_data.append({
                     "class_name": row[0],
                     "class_code": row[1],
@@ -273,6 +341,41 @@ def get_classes():
         logging.error(f"Error fetching classes: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/stats/domains', methods=['GET'])
+def get_domain_stats():
+    """Domain distribution of the latest responses (?all=1 for every response, ?min_confidence=70)"""
+    try:
+        min_confidence = request.args.get('min_confidence', type=float)
+        latest_only = request.args.get('all', '0') not in ('1', 'true')
+        distribution = db.get_domain_distribution(latest_only, min_confidence)
+        return jsonify([
+            {"domaine": domaine, "count": count} for domaine, count in distribution
+        ]), 200
+
+    except Exception as e:
+        logging.error(f"Error fetching domain stats: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/model/status', methods=['GET'])
+def model_status():
+    """Report the loaded model version, backend and prediction cache counters"""
+    stats = {
+        "cache": model_registry.cache.stats() if model_registry.cache is not None else None,
+        "batching": _predict_batcher.stats() if _predict_batcher is not None else None
+    }
+    # Never load the model just to report on it
+    loader = model_registry.current()
+    if loader is None:
+        return jsonify({"status": "unloaded", **stats}), 200
+
+    return jsonify({
+        "status": "failed" if loader.load_error else "demo" if loader.use_demo_mode else "loaded",
+        "error": loader.load_error,
+        "backend": loader.backend,
+        "model_version": loader.model_version,
+        **stats
+    }), 200
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
@@ -283,7 +386,9 @@ def not_found(error):
             "GET /api/students/by_class/<class_name>": "Get students by class",
             "GET /api/classes": "List all classes with student counts",
             "POST /api/submit": "Submit orientation results",
+            "POST /api/predict": "Predict the orientation domain from answers",
             "POST /api/verify_student": "Verify student exists",
+            "GET /api/model/status": "Model version, backend and prediction cache stats",
             "GET /api/health": "Service health check"
         }
     }), 404
@@ -306,8 +411,8 @@ if __name__ == "__main__":
     
     try:
         # Initial connection test
-        db.connect()
-        db.cursor.execute("SELECT 1")
+        with db.cursor() as cursor:
+            cursor.execute("SELECT 1")
         logging.info("Database connection established successfully")
     except Exception as e:
         logging.critical(f"Failed to initialize database: {str(e)}")
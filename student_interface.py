@@ -4,16 +4,13 @@ from PyQt5.QtWidgets import (
     QScrollArea, QGroupBox, QMessageBox
 )
 from PyQt5.QtGui import QIcon, QFont, QPixmap, QDesktopServices
-from PyQt5.QtCore import Qt, QUrl
-from models import ModelLoader
+from PyQt5.QtCore import Qt, QUrl, QThreadPool
+from workers import SubmissionWorker
 from questions import QUESTIONS
 from domain_info import DOMAIN_INFO
 import logging
 import pandas as pd
-import numpy as np
 import os
-import requests
-from datetime import datetime
 from PyQt5.QtCore import pyqtSignal
 import sys
 
@@ -42,10 +39,10 @@ class StudentInterface(QWidget):
         self.setWindowIcon(QIcon(resource_path("ressources/images/icon.png")))
         self.resize(900, 700)
         
-        self.model_loader = ModelLoader()
         self.questions = QUESTIONS
         self.answers = {}
         self.use_demo_mode = False
+        self.submission_worker = None
         
         self.init_ui()
         self.check_previous_response()
@@ -250,6 +247,7 @@ class StudentInterface(QWidget):
 
     def request_logout(self):
         """Handle logout request"""
+        self.cancel_submission()
         self.logout_requested.emit()
         self.close()
 
@@ -502,6 +500,7 @@ class StudentInterface(QWidget):
         back_btn.clicked.connect(lambda: self.stack.setCurrentIndex(0))
 
         submit_btn = QPushButton("Valider ")
+        self.submit_btn = submit_btn
         submit_btn.setCursor(Qt.PointingHandCursor)
         submit_btn.setStyleSheet("""
             QPushButton {
@@ -689,24 +688,83 @@ class StudentInterface(QWidget):
         self.stack.addWidget(page)
     
     def process_answers(self):
-        """Traite les réponses du questionnaire"""
-        try:
-            data = self.collect_answers()
-            if data is None:  
-                return
-
-            if self.model_loader.use_demo_mode:
-                self.show_demo_results()
-                return
+        """Traite les réponses du questionnaire en arrière-plan"""
+        if self.submission_worker is not None:
+            return  # Une soumission est déjà en cours
 
-            domaine, confidence = self.analyze_answers(data)
-            self.show_results(domaine, confidence)
-            self.send_to_server(domaine, confidence, data)
+        data = self.collect_answers()
+        if data is None:  
+            return
 
-        except Exception as e:
-            logging.error(f"Erreur traitement réponses: {str(e)}")
-            QMessageBox.critical(self, "Erreur", f"Une erreur est survenue:\n{str(e)}")
+        worker = SubmissionWorker(self.db, self.student_id, self.full_name, self.class_name, data)
+        worker.signals.progress.connect(self.on_submission_progress)
+        worker.signals.prediction_ready.connect(self.show_results)
+        worker.signals.finished.connect(self.on_submission_finished)
+        worker.signals.failed.connect(self.on_submission_failed)
+
+        self.submission_worker = worker
+        self.submit_btn.setEnabled(False)
+        QThreadPool.globalInstance().start(worker)
+
+    def cancel_submission(self):
+        """Annule la soumission en cours (déconnexion en cours de traitement)"""
+        if self.submission_worker is not None:
+            self.submission_worker.cancel()
+            self.end_submission()
+
+    def end_submission(self):
+        self.submission_worker = None
+        self.submit_btn.setEnabled(True)
+        self.submit_btn.setText("Valider ")
+
+    def on_submission_progress(self, percentage, stage):
+        self.submit_btn.setText(f"{stage}... {percentage}%")
+
+    def on_submission_failed(self, message):
+        self.end_submission()
+        # Pas de recommandation de secours: l'étudiant reste sur le questionnaire
+        QMessageBox.critical(self, "Erreur", f"Une erreur est survenue:\n{message}")
+
+    def on_submission_finished(self, result):
+        """Affiche le résultat de l'envoi au serveur et de la sauvegarde"""
+        self.end_submission()
+        status = result["status"]
+        message = result.get("message", "")
+
+        if status == "demo":
             self.show_demo_results()
+        elif status == "save_failed":
+            QMessageBox.warning(
+                self,
+                "Erreur sauvegarde",
+                "Erreur lors de la sauvegarde locale. Veuillez contacter l'administrateur."
+            )
+        elif status == "invalid_student":
+            QMessageBox.warning(
+                self,
+                "Erreur enregistrement",
+                "Votre compte étudiant n'est pas valide. Les résultats ont été sauvegardés localement."
+            )
+        elif status == "student_not_found":
+            QMessageBox.warning(
+                self,
+                "Erreur serveur",
+                f"Étudiant non trouvé sur le serveur:\n{message}\n"
+                "Les résultats ont été sauvegardés localement."
+            )
+        elif status == "network_error":
+            QMessageBox.warning(
+                self,
+                "Erreur réseau",
+                f"Impossible de se connecter au serveur:\n{message}\n"
+                "Les résultats ont été sauvegardés localement."
+            )
+        elif status == "backup_failed":
+            QMessageBox.critical(
+                self,
+                "Erreur critique",
+                "Impossible de sauvegarder les résultats. Veuillez réessayer ou contacter l'administrateur."
+            )
 
     def collect_answers(self):
         """Collecte et valide les réponses"""
@@ -730,116 +788,6 @@ class StudentInterface(QWidget):
         
         return data
 
-    def analyze_answers(self, data):
-        """Analyse les réponses avec le modèle"""
-        df = pd.DataFrame([data])
-        X = pd.get_dummies(df)
-
-        # Gérer les colonnes manquantes
-        if not hasattr(self.model_loader, 'feature_columns'):
-            raise ValueError("Modèle non initialisé correctement")
-            
-        missing_cols = set(self.model_loader.feature_columns) - set(X.columns)
-        for col in missing_cols:
-            X[col] = 0
-        X = X[self.model_loader.feature_columns]
-
-        # Prédiction
-        if self.model_loader.use_tensorflow:
-            pred_proba = self.model_loader.model.predict(X.values.astype(np.float32))
-            pred_class = np.argmax(pred_proba, axis=1)
-            domaine = self.model_loader.label_encoder.inverse_transform(pred_class)[0]
-            confidence = np.max(pred_proba) * 100
-        else:
-            pred_proba = self.model_loader.model.predict_proba(X)
-            pred_class = self.model_loader.model.predict(X)
-            domaine = self.model_loader.label_encoder.inverse_transform(pred_class)[0]
-            confidence = np.max(pred_proba) * 100
-
-        return domaine, confidence
-
-    def send_to_server(self, domaine, confidence, answers_data):
-        """Envoie les résultats au serveur avec meilleure gestion d'erreur"""
-        # Vérification locale avant envoi
-        if not self.db.get_student_info(self.student_id):
-            QMessageBox.warning(
-                self,
-                "Erreur enregistrement",
-                "Votre compte étudiant n'est pas valide. Les résultats seront sauvegardés localement."
-            )
-            self.save_locally(domaine, confidence)
-            return
-
-        payload = {
-            "student_id": self.student_id,
-            "full_name": self.full_name,
-            "class_name": self.class_name,
-            "domaine": domaine,
-            "confidence": confidence,
-            "answers": answers_data
-        }
-
-        try:
-            response = requests.post(
-                "http://127.0.0.1:5000/api/submit",
-                json=payload,
-                timeout=5
-            )
-        
-            # Gestion spécifique du 404
-            if response.status_code == 404:
-                error_data = response.json()
-                QMessageBox.warning(
-                    self,
-                    "Erreur serveur",
-                    f"Étudiant non trouvé sur le serveur:\n{error_data.get('error', '')}\n"
-                    "Les résultats seront sauvegardés localement."
-                )
-                self.save_locally(domaine, confidence)
-                return
-            
-            response.raise_for_status()
-        
-            # Sauvegarde dans la base de données locale
-            success = self.db.save_student_responses(self.student_id, {
-                "domaine": domaine,
-                "confidence": confidence,
-                "submission_date": datetime.now().isoformat(),
-                "answers": answers_data
-            })
-            
-            if not success:
-                QMessageBox.warning(
-                    self,
-                    "Erreur sauvegarde",
-                    "Erreur lors de la sauvegarde locale. Veuillez contacter l'administrateur."
-                )
-        
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(
-                self,
-                "Erreur réseau",
-                f"Impossible de se connecter au serveur:\n{str(e)}\n"
-                "Les résultats seront sauvegardés localement."
-            )
-            self.save_locally(domaine, confidence)
-
-    def save_locally(self, domaine, confidence):
-        """Sauvegarde de secours locale"""
-        success = self.db.save_student_responses(self.student_id, {
-            "domaine": domaine,
-            "confidence": confidence,
-            "submission_date": datetime.now().isoformat(),
-            "local_backup": True  # Marqueur pour sauvegarde locale
-        })
-        
-        if not success:
-            QMessageBox.critical(
-                self,
-                "Erreur critique",
-                "Impossible de sauvegarder les résultats. Veuillez réessayer ou contacter l'administrateur."
-            )
-
     def show_results(self, domaine, confidence):
         """Affiche les résultats à l'étudiant"""
         # Nettoyer les anciennes écoles affichées
@@ -0,0 +1,329 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from hashlib import sha256
+import numpy as np
+import pandas as pd
+from questions import QUESTIONS
+from preprocessing import CHECKBOX_SEPARATOR, normalize_text, split_checkbox_answer
+from training_data import TARGET_COLUMN
+
+DEFAULT_REFERENCE = "ressources/data/dataset_orientation.csv"
+
+# Règles de labellisation par défaut: {domaine: {question: {option: poids}}}.
+# Le domaine retenu est celui du score le plus élevé (avec un bruit réglable).
+DEFAULT_RULES = {
+    "Informatique / Ingénierie": {
+        "technologies": {"Oui": 2.0, "Moyennement": 0.5},
+        "matieres_preferees": {"Mathématiques": 1.0, "Physique-Chimie": 1.0},
+        "activites": {"Jeux vidéo": 0.8},
+        "environnement_travail": {"Bureau / travail sur ordinateur": 1.2},
+        "problemes": {"Oui, beaucoup": 1.0}
+    },
+    "Technologie / Technique": {
+        "metiers_type": {"Techniques": 1.5, "Les deux": 0.5},
+        "environnement_travail": {"Travail manuel": 1.5, "Travail en extérieur": 0.5},
+        "style_apprentissage": {"Kinesthésique (faire, manipuler)": 1.0},
+        "etudes_longues": {"Non": 0.8}
+    },
+    "Recherche / Sciences": {
+        "recherche": {"Oui": 2.0, "Un peu": 0.5},
+        "sciences": {"Oui, beaucoup": 1.5},
+        "environnement_travail": {"Laboratoire / recherche": 1.5},
+        "etudes_longues": {"Oui": 1.0},
+        "matieres_preferees": {"Sciences de la vie et de la Terre": 0.8}
+    },
+    "Santé / Social": {
+        "sante_social": {"Oui": 2.5, "Peut-être": 0.5},
+        "contacts_humains": {"Oui": 1.0},
+        "qualites": {"Patient(e)": 1.0},
+        "activites": {"Bénévolat / Engagement associatif": 1.0}
+    },
+    "Arts / Création": {
+        "arts": {"Oui": 2.0, "Un peu": 0.5},
+        "metiers_type": {"Créatifs": 1.5},
+        "matieres_preferees": {"Arts plastiques / Musique": 1.2},
+        "activites": {"Activités artistiques": 1.0},
+        "qualites": {"Créatif(ve)": 0.8}
+    },
+    "Lettres / Sciences Humaines": {
+        "litteraires": {"Oui, beaucoup": 2.0, "Un peu": 0.5},
+        "matieres_preferees": {"Français": 1.0, "Histoire-Géographie": 1.0},
+        "activites": {"Lecture": 1.0},
+        "langues": {"Avancé": 0.5, "Courant / bilingue": 0.8}
+    },
+    "Communication / Marketing": {
+        "contacts_humains": {"Oui": 1.2},
+        "entrepreneuriat": {"Oui, beaucoup": 1.5, "Un peu": 0.5},
+        "role_equipe": {"Leader / chef de projet": 1.0},
+        "qualites": {"Dynamique": 1.0},
+        "activites": {"Sorties avec des amis": 0.6}
+    },
+    "Divers": {
+        "idee_metier": {"Pas encore": 1.5, "J'ai quelques idées": 0.5},
+        "metiers_type": {"Je ne sais pas": 1.5},
+        "environnement_travail": {"Je ne sais pas": 1.0},
+        "style_apprentissage": {"Je ne sais pas": 0.8}
+    }
+}
+
+def reference_headers(reference_csv=DEFAULT_REFERENCE):
+    """En-têtes du jeu de données existant, sinon Horodateur + textes des questions + cible"""
+    if reference_csv and os.path.exists(reference_csv):
+        return list(pd.read_csv(reference_csv, nrows=0).columns)
+    return ["Horodateur", *(q["text"] for q in QUESTIONS.values()), TARGET_COLUMN]
+
+class SurveySampler:
+    """Tire des réponses au questionnaire par lots, colonne par colonne (NumPy).
+
+    Les options viennent de ``questions.QUESTIONS``; leurs fréquences sont
+    estimées sur le CSV de référence quand il existe (lissage de Laplace),
+    sinon uniformes. Les questions à choix multiples sont tirées option par
+    option (0 à n options cochées) et jointes comme dans l'export. Les
+    questions ouvertes reprennent les réponses observées dans la référence.
+    """
+
+    def __init__(self, questions=QUESTIONS, reference_csv=DEFAULT_REFERENCE, checkbox_rate=0.3, seed=42):
+        self.questions = questions
+        self.rng = np.random.default_rng(seed)
+        reference = pd.read_csv(reference_csv) if reference_csv and os.path.exists(reference_csv) else None
+        columns = {normalize_text(c): c for c in reference.columns} if reference is not None else {}
+
+        # q_id -> (options, probabilités) ; pour les cases à cocher, probabilité de chaque option
+        self.options = {}
+        for q_id, q_data in questions.items():
+            values = None
+            column = columns.get(normalize_text(q_data["text"]))
+            if column is not None:
+                values = reference[column].dropna().astype(str).map(normalize_text)
+
+            if q_data["type"] == "text":
+                options = sorted(values.unique()) if values is not None and len(values) else [""]
+                probs = np.array([np.sum(values == o) + 1.0 for o in options]) if values is not None else np.ones(1)
+                self.options[q_id] = (options, probs / probs.sum())
+                continue
+
+            options = list(q_data["options"])
+            if values is None:
+                probs = np.full(len(options), checkbox_rate if q_data["type"] == "checkbox" else 1.0 / len(options))
+            elif q_data["type"] == "checkbox":
+                selected = values.map(lambda v: set(split_checkbox_answer(v)))
+                counts = np.array([sum(normalize_text(o) in s for s in selected) for o in options], dtype=float)
+                probs = (counts + 1.0) / (len(reference) + 2.0)
+            else:
+                counts = np.array([np.sum(values == normalize_text(o)) for o in options], dtype=float)
+                probs = (counts + 1.0) / (counts.sum() + len(options))
+            self.options[q_id] = (options, probs)
+
+        # Toutes les combinaisons de cases à cocher, indexées par leur masque binaire
+        self._joined = {
+            q_id: np.array([
+                CHECKBOX_SEPARATOR.join(o for bit, o in enumerate(options) if mask >> bit & 1)
+                for mask in range(1 << len(options))
+            ], dtype=object)
+            for q_id, (options, _) in self.options.items() if questions[q_id]["type"] == "checkbox"
+        }
+
+        # Espace (question, option) pour les règles de labellisation
+        self.pairs = [(q_id, normalize_text(o)) for q_id, (options, _) in self.options.items() for o in options]
+
+    def sample(self, n):
+        """Renvoie ({q_id: tableau de n réponses}, matrice (n, len(pairs)) des options choisies)"""
+        values, blocks = {}, []
+        for q_id, (options, probs) in self.options.items():
+            if self.questions[q_id]["type"] == "checkbox":
+                mask = self.rng.random((n, len(options))) < probs
+                codes = mask @ (1 << np.arange(len(options)))
+                values[q_id] = self._joined[q_id][codes]
+                blocks.append(mask)
+            else:
+                index = self.rng.choice(len(options), size=n, p=probs)
+                values[q_id] = np.array(options, dtype=object)[index]
+                blocks.append(np.eye(len(options), dtype=bool)[index])
+        return values, np.concatenate(blocks, axis=1)
+
+class RuleLabeler:
+    """Domaine = argmax des poids des options choisies + bruit de Gumbel (``temperature``)"""
+
+    def __init__(self, sampler, rules=None, temperature=0.5, seed=42):
+        rules = rules or DEFAULT_RULES
+        self.classes = list(rules)
+        self.temperature = temperature
+        self.rng = np.random.default_rng(seed)
+        index = {pair: i for i, pair in enumerate(sampler.pairs)}
+        self.weights = np.zeros((len(sampler.pairs), len(self.classes)), dtype=np.float32)
+        for class_id, domaine in enumerate(self.classes):
+            for q_id, options in rules[domaine].items():
+                for option, weight in options.items():
+                    pair = (q_id, normalize_text(option))
+                    if pair not in index:
+                        raise ValueError(f"Règle inconnue pour {domaine}: {q_id} / {option}")
+                    self.weights[index[pair], class_id] = weight
+
+    def label(self, values, choices):
+        scores = choices.astype(np.float32) @ self.weights
+        if self.temperature > 0:
+            scores = scores / self.temperature
+            noisy = scores + self.rng.gumbel(size=scores.shape)
+        else:
+            noisy = scores
+        class_ids = np.argmax(noisy, axis=1)
+        probs = np.exp(scores - scores.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        labels = np.array(self.classes, dtype=object)[class_ids]
+        return labels, probs[np.arange(len(class_ids)), class_ids] * 100
+
+class ModelLabeler:
+    """Domaine prédit par le modèle actuel (ModelLoader.predict_batch)"""
+
+    def __init__(self, model_loader, questions=QUESTIONS, batch_size=1024):
+        if model_loader.use_demo_mode or model_loader.load_error:
+            raise RuntimeError(f"Modèle indisponible: labellisation par le modèle impossible {model_loader.load_error or ''}")
+        self.model_loader = model_loader
+        self.texts = {q_id: q["text"] for q_id, q in questions.items()}
+        self.batch_size = batch_size
+
+    def label(self, values, choices):
+        q_ids = list(values)
+        rows = [
+            {self.texts[q_id]: answer for q_id, answer in zip(q_ids, answers) if answer}
+            for answers in zip(*(values[q_id] for q_id in q_ids))
+        ]
+        _, labels, probabilities = self.model_loader.predict_batch(rows, batch_size=self.batch_size)
+        return np.asarray(labels, dtype=object), probabilities.max(axis=1) * 100
+
+def random_dates(rng, n, days=365):
+    """n dates aléatoires sur les ``days`` derniers jours"""
+    now = datetime.now()
+    offsets = rng.integers(0, days * 86400, size=n)
+    return [now - timedelta(seconds=int(s)) for s in offsets]
+
+def write_csv(path, n_rows, sampler, labeler, headers, chunk_size=100000):
+    """Écrit n_rows lignes par lots de chunk_size (mémoire constante)"""
+    by_text = {normalize_text(q["text"]): q_id for q_id, q in sampler.questions.items()}
+    header_ids = [by_text.get(normalize_text(h)) for h in headers]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    start = time.perf_counter()
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        while written < n_rows:
+            n = min(chunk_size, n_rows - written)
+            values, choices = sampler.sample(n)
+            labels, _ = labeler.label(values, choices)
+            dates = [d.strftime("%d/%m/%Y %H:%M:%S") for d in random_dates(sampler.rng, n)]
+
+            columns = []
+            for header, q_id in zip(headers, header_ids):
+                if q_id is not None:
+                    columns.append(values[q_id])
+                elif header == TARGET_COLUMN:
+                    columns.append(labels)
+                else:
+                    columns.append(dates)
+            writer.writerows(zip(*columns))
+
+            written += n
+            elapsed = time.perf_counter() - start
+            print(f"{written}/{n_rows} lignes ({written / max(elapsed, 1e-9):.0f} lignes/s)")
+    return written
+
+def populate_database(db, sampler, labeler, n_classes, students_per_class, max_responses=3,
+                      chunk_size=5000, password=""):
+    """Crée des classes, des élèves et un historique de réponses au format de l'application"""
+    rng = sampler.rng
+    password_hash = sha256(password.encode('utf-8')).hexdigest()
+    texts = {q_id: q["text"] for q_id, q in sampler.questions.items()}
+    # Valeurs enregistrées par l'interface pour une question laissée vide
+    empty = {q_id: "Aucune" if q["type"] == "checkbox" else "Non spécifié" for q_id, q in sampler.questions.items()}
+
+    classes = [(f"Classe synthétique {i + 1:04d}", f"SYN{i + 1:05d}") for i in range(n_classes)]
+    if not db.bulk_insert_classes(classes):
+        raise RuntimeError("Échec de la création des classes")
+
+    students = [
+        (f"etu_syn{c * students_per_class + s:07d}", class_name)
+        for c, (class_name, _) in enumerate(classes) for s in range(students_per_class)
+    ]
+    start = time.perf_counter()
+    n_responses = 0
+    for offset in range(0, len(students), chunk_size):
+        chunk = students[offset:offset + chunk_size]
+        if not db.bulk_insert_students([
+            (student_id, password_hash, f"Élève {student_id[7:]}", class_name) for student_id, class_name in chunk
+        ]):
+            raise RuntimeError("Échec de la création des élèves")
+
+        # 1 à max_responses soumissions par élève, dans l'ordre chronologique
+        counts = rng.integers(1, max_responses + 1, size=len(chunk))
+        values, choices = sampler.sample(int(counts.sum()))
+        labels, confidences = labeler.label(values, choices)
+        dates = sorted(random_dates(rng, len(labels)))
+        owners = np.repeat([student_id for student_id, _ in chunk], counts)
+        rng.shuffle(owners)
+
+        responses = []
+        for i, student_id in enumerate(owners):
+            responses.append((student_id, {
+                "domaine": str(labels[i]),
+                "confidence": float(confidences[i]),
+                "submission_date": dates[i].isoformat(),
+                "answers": {texts[q_id]: values[q_id][i] or empty[q_id] for q_id in values}
+            }, dates[i].strftime("%Y-%m-%d %H:%M:%S")))
+        if not db.bulk_insert_responses(responses):
+            raise RuntimeError("Échec de l'enregistrement des réponses")
+
+        n_responses += len(responses)
+        elapsed = time.perf_counter() - start
+        print(f"{offset + len(chunk)}/{len(students)} élèves, {n_responses} réponses "
+              f"({n_responses / max(elapsed, 1e-9):.0f} réponses/s)")
+    return len(students), n_responses
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des questionnaires synthétiques (tests de charge)")
+    parser.add_argument("--rows", type=int, default=100000, help="Lignes du CSV généré (0: pas de CSV)")
+    parser.add_argument("--output", default="ressources/data/dataset_synthetique.csv")
+    parser.add_argument("--reference", default=DEFAULT_REFERENCE, help="CSV dont on reprend en-têtes et fréquences")
+    parser.add_argument("--labels", choices=["rules", "model"], default="rules")
+    parser.add_argument("--rules", default=None, help="Fichier JSON {domaine: {question: {option: poids}}}")
+    parser.add_argument("--temperature", type=float, default=0.5, help="Bruit des règles (0: déterministe)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Lignes générées par lot")
+    parser.add_argument("--db", default=None, help="Remplir aussi cette base students.db")
+    parser.add_argument("--classes", type=int, default=50)
+    parser.add_argument("--students-per-class", type=int, default=30)
+    parser.add_argument("--max-responses", type=int, default=3, help="Soumissions maximum par élève")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    sampler = SurveySampler(reference_csv=args.reference, seed=args.seed)
+    if args.labels == "model":
+        from models import ModelLoader
+        labeler = ModelLabeler(ModelLoader())
+    else:
+        rules = None
+        if args.rules:
+            with open(args.rules, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+        labeler = RuleLabeler(sampler, rules, args.temperature, args.seed)
+
+    if args.rows:
+        write_csv(args.output, args.rows, sampler, labeler, reference_headers(args.reference), args.chunk_size)
+        print(f"CSV écrit: {args.output}")
+
+    if args.db:
+        from database import StudentDatabase
+        n_students, n_responses = populate_database(
+            StudentDatabase(args.db), sampler, labeler,
+            args.classes, args.students_per_class, args.max_responses
+        )
+        print(f"Base {args.db}: {args.classes} classes, {n_students} élèves, {n_responses} réponses")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import json
+import sqlite3
+
+import pytest
+
+import database
+from answer_codec import AnswerCodec, questionnaire_schema, schema_version_of
+from database import StudentDatabase
+from questions import QUESTIONS
+
+def question_text(q_id):
+    return QUESTIONS[q_id]["text"]
+
+def gui_answers():
+    """Answers shaped like StudentInterface.collect_answers(), every question answered"""
+    answers = {}
+    for q_id, q_data in QUESTIONS.items():
+        if q_data["type"] == "radio":
+            answers[q_data["text"]] = q_data["options"][-1]
+        elif q_data["type"] == "checkbox":
+            answers[q_data["text"]] = ", ".join(q_data["options"][:2])
+        else:
+            answers[q_data["text"]] = "Devenir ingénieur(e) 🚀"
+    return answers
+
+def make_db(tmp_path, name="students.db"):
+    db = StudentDatabase(str(tmp_path / name), pool_size=2, profile="throughput")
+    db.bulk_insert_classes([("Terminale S", "TS1")])
+    db.bulk_insert_students([("E001", "hash", "Alice Martin", "Terminale S")])
+    return db
+
+@pytest.fixture
+def codec():
+    return AnswerCodec(questionnaire_schema(), 1)
+
+def test_round_trip_keeps_every_answer_and_the_key_order(codec):
+    answers = dict(reversed(list(gui_answers().items())))
+    decoded = codec.decode(codec.encode(answers))
+
+    assert decoded == answers
+    assert list(decoded) == list(answers)
+
+def test_round_trip_of_answers_that_are_not_options(codec):
+    answers = {
+        question_text("age"): "Plus de 30 ans",                          # not an option
+        question_text("matieres_preferees"): "Aucune",                   # empty checkbox
+        question_text("activites"): "Sports",                            # single checkbox option
+        question_text("qualites"): "Curieux(se), Inventé(e)",            # one unknown part
+        question_text("matieres_moins_aimees"): "Mathématiques,Français",  # other separator
+        question_text("objectifs"): "",
+        question_text("vie_pro"): "Non spécifié",
+        "Question supprimée": "Oui",
+        question_text("langues"): 3,
+        "notes": {"score": [1, 2.5, None], "ok": True},
+    }
+    assert codec.decode(codec.encode(answers)) == answers
+
+def test_encoded_answers_are_compact(codec):
+    answers = gui_answers()
+    assert len(codec.encode(answers)) < len(json.dumps(answers, ensure_ascii=False).encode("utf-8")) // 10
+
+def test_decode_rejects_another_schema_version(codec):
+    blob = codec.encode(gui_answers())
+    assert schema_version_of(blob) == 1
+    with pytest.raises(ValueError):
+        AnswerCodec(questionnaire_schema(), 2).decode(blob)
+
+def test_answers_saved_before_a_questionnaire_change_still_decode(tmp_path, monkeypatch):
+    answers = gui_answers()
+    db = make_db(tmp_path)
+    assert db.save_student_responses("E001", {"domaine": "Informatique", "confidence": 80.0, "answers": answers})
+    db.close()
+
+    # New questionnaire: an option inserted in front of another and a question removed
+    schema = questionnaire_schema()
+    schema[0][3] = ["Moins de 12 ans"] + schema[0][3]
+    del schema[1]
+    monkeypatch.setattr(database, "questionnaire_schema", lambda: schema)
+
+    db = make_db(tmp_path)
+    assert db.answer_codec.version == 2
+    assert db.get_last_response("E001")["answers"] == answers
+
+    new_answers = {schema[0][1]: "Moins de 12 ans"}
+    assert db.save_student_responses("E001", {"domaine": "Arts", "confidence": 60.0, "answers": new_answers})
+    with db.cursor() as cursor:
+        blobs = [row[0] for row in cursor.execute("SELECT answers FROM student_responses ORDER BY id")]
+    assert [schema_version_of(blob) for blob in blobs] == [1, 2]
+    assert [db.decode_answers(blob) for blob in blobs] == [answers, new_answers]
+    db.close()
+
+# student_responses and students as created by the first release
+BASELINE_SCHEMA = [
+    '''CREATE TABLE students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        class TEXT NOT NULL,
+        registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_login DATETIME)''',
+    '''CREATE TABLE student_responses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id TEXT NOT NULL,
+        response_data TEXT NOT NULL,
+        submission_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+        synced INTEGER DEFAULT 0,
+        FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE)''',
+]
+
+def test_migrating_a_baseline_database(tmp_path):
+    path = str(tmp_path / "students.db")
+    answers = gui_answers()
+    payloads = [
+        ("E001", {"domaine": "Arts", "confidence": 55.5, "answers": answers}, "2024-01-01T10:00:00"),
+        ("E001", {"domaine": "Informatique", "confidence": 91.0, "answers": answers}, "2024-03-01T10:00:00"),
+        ("E002", {"domaine": "Santé", "confidence": "70", "local_backup": True}, "2024-02-01T10:00:00"),
+    ]
+    conn = sqlite3.connect(path)
+    for statement in BASELINE_SCHEMA:
+        conn.execute(statement)
+    conn.executemany("INSERT INTO students (student_id, password_hash, full_name, class) VALUES (?, 'x', ?, 'TS')",
+                     [("E001", "Alice Martin"), ("E002", "Bob Durand")])
+    conn.executemany("INSERT INTO student_responses (student_id, response_data, submission_date) VALUES (?, ?, ?)",
+                     [(student_id, json.dumps(data, ensure_ascii=False), date) for student_id, data, date in payloads])
+    conn.commit()
+    conn.close()
+
+    db = StudentDatabase(path, pool_size=2)
+    with db.cursor() as cursor:
+        rows = cursor.execute('''
+            SELECT response_data, answers, domaine, confidence, local_backup FROM student_responses ORDER BY id
+        ''').fetchall()
+        latest = cursor.execute('''
+            SELECT student_id, response_id, domaine, confidence FROM student_latest_response ORDER BY student_id
+        ''').fetchall()
+
+    for (response_data, blob, domaine, confidence, local_backup), (_, data, _) in zip(rows, payloads):
+        assert "answers" not in json.loads(response_data)
+        assert (blob is not None) == ("answers" in data)
+        if blob is not None:
+            assert db.decode_answers(blob) == data["answers"]
+        assert (domaine, confidence, local_backup) == (data["domaine"], float(data["confidence"]),
+                                                       int(data.get("local_backup", False)))
+
+    assert latest == [("E001", 2, "Informatique", 91.0), ("E002", 3, "Santé", 70.0)]
+    assert db.get_last_response("E001") == payloads[1][1]
+    db.close()
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database import ConnectionPool, StudentDatabase
+
+@pytest.fixture
+def db(tmp_path):
+    db = StudentDatabase(str(tmp_path / "students.db"), pool_size=2, profile="throughput")
+    yield db
+    db.close()
+
+def class_names(db):
+    # Read from a separate connection: only committed rows are visible
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT class_name FROM classes ORDER BY class_name")]
+    finally:
+        conn.close()
+
+def test_nested_cursor_commits_with_the_outermost_block(db):
+    with db.cursor() as outer:
+        outer.execute("INSERT INTO classes (class_name, class_code) VALUES ('Seconde A', 'S2A')")
+        with db.cursor() as inner:
+            inner.execute("INSERT INTO classes (class_name, class_code) VALUES ('Seconde B', 'S2B')")
+        assert db.get_class_name("S2B") == "Seconde B"
+        assert class_names(db) == []
+    assert class_names(db) == ["Seconde A", "Seconde B"]
+
+def test_inner_block_error_rolls_back_the_whole_outer_block(db):
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.cursor() as outer:
+            outer.execute("INSERT INTO classes (class_name, class_code) VALUES ('Seconde A', 'S2A')")
+            assert db.get_class_name("S2A") == "Seconde A"
+            with db.cursor() as inner:
+                inner.execute("INSERT INTO classes (class_name, class_code) VALUES ('Seconde B', 'S2B')")
+                inner.execute("INSERT INTO classes (class_name, class_code) VALUES ('Doublon', 'S2B')")
+    assert class_names(db) == []
+
+    # The connection is usable again, outside any transaction
+    assert db.create_class("Première", "P1")
+    assert class_names(db) == ["Première"]
+
+def test_threads_never_share_a_pooled_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=10)
+    in_use, lock, errors = set(), threading.Lock(), []
+
+    def work():
+        for _ in range(20):
+            with pool.connection() as conn:
+                with lock:
+                    if id(conn) in in_use:
+                        errors.append("connection shared between threads")
+                    in_use.add(id(conn))
+                # Nested checkouts on the same thread reuse the connection
+                with pool.connection() as nested:
+                    if nested is not conn:
+                        errors.append("nested checkout got another connection")
+                time.sleep(0.001)
+                with lock:
+                    in_use.discard(id(conn))
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.close_all()
+
+    assert errors == []
+
+def test_concurrent_writes_through_a_small_pool(db):
+    db.bulk_insert_classes([("Terminale", "T1")])
+    db.bulk_insert_students([(f"E{i}", "hash", f"Élève {i}", "Terminale") for i in range(6)])
+
+    def submit(student_id):
+        for n in range(10):
+            assert db.save_student_responses(student_id, {"domaine": "Arts", "confidence": float(n)})
+
+    threads = [threading.Thread(target=submit, args=(f"E{i}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with db.cursor() as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM student_responses").fetchone()[0] == 60
+        assert cursor.execute("SELECT COUNT(*) FROM student_latest_response").fetchone()[0] == 6
+
+def test_exhausted_pool_times_out_instead_of_deadlocking(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=0.2)
+    errors = []
+
+    def wait_for_connection():
+        try:
+            with pool.connection():
+                pass
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    with pool.connection():
+        waiter = threading.Thread(target=wait_for_connection)
+        started = time.monotonic()
+        waiter.start()
+        waiter.join(5)
+        elapsed = time.monotonic() - started
+
+    assert not waiter.is_alive()
+    assert len(errors) == 1 and elapsed < 2
+
+    # The slot is free again once the holder returns its connection
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    pool.close_all()
+
+def latest_rows(db):
+    with db.cursor() as cursor:
+        table = cursor.execute('''
+            SELECT student_id, response_id, domaine, confidence, submission_date
+            FROM student_latest_response ORDER BY student_id
+        ''').fetchall()
+        expected = cursor.execute('''
+            SELECT r.student_id, r.id, r.domaine, r.confidence, r.submission_date FROM student_responses r
+            WHERE r.id = (
+                SELECT r2.id FROM student_responses r2 WHERE r2.student_id = r.student_id
+                ORDER BY r2.submission_date DESC, r2.id DESC LIMIT 1
+            )
+            ORDER BY r.student_id
+        ''').fetchall()
+    return table, expected
+
+def test_latest_response_follows_submission_order(db):
+    db.bulk_insert_classes([("Terminale", "T1")])
+    db.bulk_insert_students([("E1", "hash", "Alice", "Terminale"), ("E2", "hash", "Bob", "Terminale")])
+
+    # Imported out of order, including a date after the live submissions below
+    assert db.bulk_insert_responses([
+        ("E1", {"domaine": "Arts", "confidence": 40.0}, "2024-03-01 09:00:00"),
+        ("E1", {"domaine": "Santé", "confidence": 50.0}, "2024-01-01 09:00:00"),
+        ("E2", {"domaine": "Droit", "confidence": 60.0}, "2099-01-01 00:00:00"),
+    ])
+    table, expected = latest_rows(db)
+    assert table == expected
+    assert [row[2] for row in table] == ["Arts", "Droit"]
+
+    assert db.save_student_responses("E1", {"domaine": "Informatique", "confidence": 90.0})
+    assert db.save_student_responses("E2", {"domaine": "Commerce", "confidence": 70.0})
+    # Older than the current latest row: must not replace it
+    assert db.bulk_insert_responses([("E1", {"domaine": "Sport", "confidence": 30.0}, "2023-06-01 09:00:00")])
+    # Same date as the current latest row: the higher id wins
+    assert db.bulk_insert_responses([
+        ("E2", {"domaine": "Langues", "confidence": 65.0}, "2099-01-01 00:00:00"),
+    ])
+
+    table, expected = latest_rows(db)
+    assert table == expected
+    assert [row[2] for row in table] == ["Informatique", "Langues"]
+
+def test_latest_responses_are_backfilled_once(db):
+    db.bulk_insert_classes([("Terminale", "T1")])
+    db.bulk_insert_students([("E1", "hash", "Alice", "Terminale"), ("E2", "hash", "Bob", "Terminale")])
+    db.bulk_insert_responses([
+        ("E1", {"domaine": "Arts", "confidence": 40.0}, "2024-03-01 09:00:00"),
+        ("E1", {"domaine": "Santé", "confidence": 50.0}, "2024-01-01 09:00:00"),
+        ("E2", {"domaine": "Droit", "confidence": 60.0}, "2024-02-01 09:00:00"),
+    ])
+    # A database written before student_latest_response existed
+    with db.cursor() as cursor:
+        cursor.execute("DELETE FROM student_latest_response")
+    db.close()
+
+    reopened = StudentDatabase(db.db_path, pool_size=2, profile="throughput")
+    table, expected = latest_rows(reopened)
+    assert table == expected and len(table) == 2
+
+    # Not recomputed on later openings: the table is maintained on every submission
+    with reopened.cursor() as cursor:
+        cursor.execute("UPDATE student_latest_response SET domaine = 'Modifié' WHERE student_id = 'E2'")
+    reopened.close()
+    reopened = StudentDatabase(db.db_path, pool_size=2, profile="throughput")
+    assert [row[2] for row in latest_rows(reopened)[0]] == ["Arts", "Modifié"]
+    reopened.close()
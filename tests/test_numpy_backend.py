@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from numpy_backend import (
+    NumpyDenseModel, check_parity, export_dense_weights, export_quantized_variants, quantize_int8
+)
+
+# Max |diff| on the output probabilities, per stored precision
+PARITY_ATOL = {"float32": 1e-5, "float16": 5e-3, "int8": 5e-2}
+
+def one_hot_rows(n_rows, n_features, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random((n_rows, n_features)) < 0.1).astype(np.float32)
+
+@pytest.fixture(scope="module")
+def keras_model():
+    tf = pytest.importorskip("tensorflow")
+    from tensorflow.keras.layers import Dense, Dropout, InputLayer
+    from tensorflow.keras.models import Sequential
+
+    tf.random.set_seed(0)
+    model = Sequential([
+        InputLayer(input_shape=(40,)),
+        Dense(32, activation="relu"),
+        Dropout(0.3),
+        Dense(16, activation="relu"),
+        Dense(5, activation="softmax"),
+    ])
+    # Non-zero biases, as after training
+    for layer in model.layers:
+        if isinstance(layer, Dense):
+            kernel, bias = layer.get_weights()
+            layer.set_weights([kernel, np.linspace(-0.5, 0.5, bias.size).astype(np.float32)])
+    return model
+
+@pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+def test_exported_model_matches_keras(keras_model, tmp_path, precision):
+    path = str(tmp_path / "model.npz")
+    export_dense_weights(keras_model, path)
+    if precision != "float32":
+        path = export_quantized_variants(keras_model, path, precisions=(precision,))[precision]
+    numpy_model = NumpyDenseModel.load(path)
+
+    X = one_hot_rows(512, 40, seed=1)
+    expected = keras_model(X, training=False).numpy()
+    actual = numpy_model.predict_proba(X)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=PARITY_ATOL[precision])
+
+def test_check_parity_rejects_a_different_model(keras_model, tmp_path):
+    path = str(tmp_path / "model.npz")
+    export_dense_weights(keras_model, path)
+    numpy_model = NumpyDenseModel.load(path)
+    numpy_model.layers[-1] = (numpy_model.layers[-1][0] * 2, *numpy_model.layers[-1][1:])
+
+    with pytest.raises(ValueError):
+        check_parity(keras_model, numpy_model)
+
+def test_forward_pass_without_tensorflow():
+    rng = np.random.default_rng(0)
+    w1, b1 = rng.normal(size=(8, 4)).astype(np.float32), rng.normal(size=4).astype(np.float32)
+    w2, b2 = rng.normal(size=(4, 3)).astype(np.float32), rng.normal(size=3).astype(np.float32)
+    model = NumpyDenseModel([(w1, b1, "relu"), (w2, b2, "softmax")])
+
+    X = one_hot_rows(16, 8)
+    hidden = np.maximum(X @ w1 + b1, 0)
+    logits = hidden @ w2 + b2
+    expected = np.exp(logits - logits.max(axis=1, keepdims=True))
+    expected /= expected.sum(axis=1, keepdims=True)
+
+    np.testing.assert_allclose(model.predict_proba(X), expected, rtol=1e-5, atol=1e-6)
+
+def test_int8_quantization_error_is_bounded():
+    kernel = np.random.default_rng(0).normal(size=(64, 32)).astype(np.float32)
+    quantized, scale = quantize_int8(kernel)
+
+    assert quantized.dtype == np.int8
+    assert np.max(np.abs(quantized.astype(np.float32) * scale - kernel)) <= scale / 2 + 1e-7
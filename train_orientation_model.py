@@ -1,96 +1,288 @@
 import os
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.optimizers import Adam
 import joblib
-import matplotlib.pyplot as plt
+import time
+import shutil
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from training_data import build_vocabulary, make_dataset, load_encoded_dataset, dataset_cache_key
+from training_callbacks import ResumableEarlyStopping, TrainingCheckpoint, TrainingTelemetry
+from numpy_backend import export_and_verify, export_quantized_variants, NumpyDenseModel
 
-def main():
-    # 1. Charger les données
-    df = pd.read_csv("ressources/data/dataset_orientation.csv")
-    
-    # 2. Prétraitement des données
-    if "Horodateur" in df.columns:
-        df = df.drop(columns=["Horodateur"])
-    
-    target_col = "Champ convenable"
-    X = df.drop(columns=[target_col])
-    y = df[target_col]
-    
-    # Encodage des labels
-    label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(y)
-    
-    # Encodage One-Hot des features
-    X_encoded = pd.get_dummies(X)
-    feature_columns = X_encoded.columns.tolist()
+DEFAULT_CSV = "ressources/data/dataset_orientation.csv"
+MODELS_DIR = "ressources/models"
+GRAPHS_DIR = "ressources/graphiques"
+
+@dataclass
+class TrainingConfig:
+    """Paramètres d'un entraînement (les valeurs par défaut reproduisent le script historique)"""
+    csv_path: str = DEFAULT_CSV
+    stream: bool = False              # lire le CSV par morceaux (gros exports)
+    chunksize: int = 10000
+    shuffle_buffer: int = 10000
+    cache_dir: Optional[str] = None   # dossier de cache tf.data (mode streaming)
+    test_size: float = 0.2
+    seed: int = 42
+    epochs: int = 100
+    batch_size: int = 32
+    patience: int = 5
+    verbose: int = 1
+    plot: bool = True                 # courbe d'apprentissage, rendue après la sauvegarde des modèles
+    plot_formats: Tuple[str, ...] = ("png", "pdf")
+    plot_dpi: int = 300
+    compare_variants: bool = True     # comparaison des variantes à précision réduite
+    models_dir: str = MODELS_DIR      # modèles, encodeurs et historique
+    graphs_dir: str = GRAPHS_DIR      # courbe d'apprentissage
+    checkpoint_dir: Optional[str] = None  # défaut: <models_dir>/checkpoints
+    checkpoint_every: int = 1         # époques entre deux points de reprise
+    resume: bool = False              # reprendre depuis le dernier point de reprise
+    telemetry_path: Optional[str] = None  # défaut: <models_dir>/training_telemetry.jsonl
+
+    def __post_init__(self):
+        if self.checkpoint_dir is None:
+            self.checkpoint_dir = os.path.join(self.models_dir, "checkpoints")
+        if self.telemetry_path is None:
+            self.telemetry_path = os.path.join(self.models_dir, "training_telemetry.jsonl")
+
+@dataclass
+class TrainingResult:
+    accuracy: float
+    report: dict                      # classification_report(output_dict=True)
+    history: dict
+    n_features: int
+    classes: List[str]
+    variant_paths: Dict[str, str]
+    plot_paths: List[str] = field(default_factory=list)
+    train_time_s: float = 0.0
+
+def train(config=None):
+    """Entraîne, sauvegarde puis évalue le modèle; utilisable sans affichage (serveur, planificateur)"""
+    config = config or TrainingConfig()
+    start = time.perf_counter()
+    if config.stream:
+        model, label_encoder, feature_columns, history, checkpoint, X_eval, y_eval, y_pred = _fit_streaming(config)
+    else:
+        model, label_encoder, feature_columns, history, checkpoint, X_eval, y_eval, y_pred = _fit_in_memory(config)
+    train_time = time.perf_counter() - start
+
+    # Évaluation
+    accuracy = accuracy_score(y_eval, y_pred)
+    labels = range(len(label_encoder.classes_))
+    print(f"Accuracy: {accuracy:.2f}")
+    print("Classification Report:")
+    print(classification_report(
+        y_eval, y_pred, labels=labels, target_names=label_encoder.classes_, zero_division=0
+    ))
+
+    # Sauvegarde des modèles avant tout rendu de rapport
+    variant_paths = save_artifacts(model, label_encoder, feature_columns, history, config.models_dir)
+    checkpoint.clear()
+    print_history_summary(history.history)
+
+    plot_paths = []
+    if config.plot:
+        plot_paths = plot_learning_curve(
+            history, output_dir=config.graphs_dir, formats=config.plot_formats, dpi=config.plot_dpi
+        )
+
+    # X_eval n'est disponible qu'en mémoire (None en streaming)
+    if config.compare_variants and X_eval is not None:
+        report_model_variants(
+            np.asarray(X_eval, dtype=np.float32), y_eval,
+            {
+                "keras float32": os.path.join(config.models_dir, "orientation_deep_model.h5"),
+                "numpy float32": os.path.join(config.models_dir, "orientation_deep_model.npz"),
+                **{f"numpy {precision}": path for precision, path in variant_paths.items()}
+            }
+        )
+
+    return TrainingResult(
+        accuracy=float(accuracy),
+        report=classification_report(
+            y_eval, y_pred, labels=labels, target_names=label_encoder.classes_,
+            zero_division=0, output_dict=True
+        ),
+        history=history.history,
+        n_features=len(feature_columns),
+        classes=[str(c) for c in label_encoder.classes_],
+        variant_paths=variant_paths,
+        plot_paths=plot_paths,
+        train_time_s=train_time
+    )
+
+def _fit_in_memory(config):
+    # 1-2. Charger et encoder les données (cache disque indexé par le contenu du CSV):
+    # multi-hot pour les questions à choix multiples, one-hot pour les autres
+    # (partagé avec ModelLoader via AnswerEncoder)
+    dataset = load_encoded_dataset(config.csv_path)
     
     # 3. Séparation train/test
     X_train, X_test, y_train, y_test = train_test_split(
-        X_encoded, y_encoded, test_size=0.2, random_state=42
+        dataset.X, dataset.y, test_size=config.test_size, random_state=config.seed
     )
     
     # 4. Construction du modèle
-    model = Sequential([
-        Dense(256, activation='relu', input_shape=(X_train.shape[1],)),
-        Dropout(0.3),
-        Dense(128, activation='relu'),
-        Dropout(0.2),
-        Dense(len(label_encoder.classes_), activation='softmax')
-    ])
+    model = build_model(X_train.shape[1], len(dataset.label_encoder.classes_))
     
-    model.compile(
-        loss='sparse_categorical_crossentropy',
-        optimizer='adam',
-        metrics=['accuracy']
+    # 5. Entraînement avec historique (20% de X_train pour la validation)
+    print("Début de l'entraînement...")
+    history, checkpoint = _fit(
+        model, config, dataset.cache_key, dict(x=X_train, y=y_train, validation_split=0.2, batch_size=config.batch_size),
+        samples_per_epoch=int(len(X_train) * (1 - 0.2))
     )
+    y_pred = np.argmax(model.predict(X_test, verbose=0), axis=1)
+    return model, dataset.label_encoder, dataset.feature_columns, history, checkpoint, X_test, y_test, y_pred
+
+def _fit_streaming(config):
+    """Entraînement sur un export volumineux lu par morceaux (mémoire constante)"""
+    # 1. Premier passage: vocabulaire des features et des labels
+    feature_columns, label_encoder = build_vocabulary(config.csv_path, config.chunksize)
+    print(f"{len(feature_columns)} features, {len(label_encoder.classes_)} classes")
     
-    # 5. Entraînement avec historique
-    early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+    # 2. Pipelines d'entrée (une fraction des lignes réservée à la validation)
+    def dataset(subset):
+        cache_path = os.path.join(config.cache_dir, f"{subset}.tfcache") if config.cache_dir else None
+        return make_dataset(
+            config.csv_path, feature_columns, label_encoder, subset=subset, batch_size=config.batch_size,
+            chunksize=config.chunksize, shuffle_buffer=config.shuffle_buffer, cache_path=cache_path,
+            validation_fraction=config.test_size, seed=config.seed
+        )
+    if config.cache_dir:
+        os.makedirs(config.cache_dir, exist_ok=True)
+    train_ds, val_ds = dataset("train"), dataset("validation")
     
-    print("Début de l'entraînement...")
-    history = model.fit(
-        X_train, y_train,
-        validation_split=0.2,
-        epochs=100,
-        batch_size=32,
-        callbacks=[early_stop],
-        verbose=1
-    )
+    # 3. Entraînement
+    model = build_model(len(feature_columns), len(label_encoder.classes_))
     
-    # 6. Générer la courbe d'apprentissage
-    plot_learning_curve(history)
+    print("Début de l'entraînement (streaming)...")
+    history, checkpoint = _fit(model, config, dataset_cache_key(config.csv_path), dict(x=train_ds, validation_data=val_ds))
     
-    # 7. Évaluation
-    y_pred = np.argmax(model.predict(X_test), axis=1)
-    accuracy = accuracy_score(y_test, y_pred)
-    print(f"Accuracy: {accuracy:.2f}")
-    print("Classification Report:")
-    print(classification_report(y_test, y_pred, target_names=label_encoder.classes_))
+    # 4. Prédictions sur la validation, lot par lot
+    y_true, y_pred = [], []
+    for X_batch, y_batch in val_ds:
+        y_pred.append(np.argmax(model(X_batch, training=False).numpy(), axis=1))
+        y_true.append(y_batch.numpy())
+    return model, label_encoder, feature_columns, history, checkpoint, None, np.concatenate(y_true), np.concatenate(y_pred)
+
+def _fit(model, config, data_key, fit_kwargs, samples_per_epoch=None):
+    """model.fit avec early stopping, points de reprise périodiques et télémétrie par époque"""
+    early_stop = ResumableEarlyStopping(monitor='val_loss', patience=config.patience, restore_best_weights=True)
+    fingerprint = f"{data_key}:{model.input_shape[-1]}x{model.output_shape[-1]}:seed{config.seed}:test{config.test_size}"
+    if not config.resume:
+        shutil.rmtree(config.checkpoint_dir, ignore_errors=True)
+    checkpoint = TrainingCheckpoint(
+        model, config.checkpoint_dir, interval=config.checkpoint_every,
+        fingerprint=fingerprint, early_stopping=early_stop
+    )
+
+    initial_epoch = 0
+    if config.resume:
+        initial_epoch = checkpoint.restore()
+        print(f"Reprise à l'époque {initial_epoch}" if initial_epoch else "Aucun point de reprise: nouvel entraînement")
+
+    telemetry = TrainingTelemetry(
+        config.telemetry_path, samples_per_epoch=samples_per_epoch, batch_size=config.batch_size,
+        run_info={"run": time.strftime("%Y%m%d-%H%M%S"), "stream": config.stream, "data": data_key}
+    )
+    history = model.fit(
+        **fit_kwargs,
+        epochs=config.epochs,
+        initial_epoch=initial_epoch,
+        callbacks=[early_stop, checkpoint, telemetry],
+        verbose=config.verbose
+    )
+
+    # Historique complet (époques d'avant la reprise comprises)
+    history.history = checkpoint.history
+    return history, checkpoint
+
+def main(csv_path=DEFAULT_CSV):
+    return train(TrainingConfig(csv_path=csv_path))
+
+def build_model(input_dim, n_classes, units=(256, 128), dropout=(0.3, 0.2), learning_rate=0.001):
+    """Construit et compile le réseau d'orientation (une couche Dense + Dropout par entrée de units)"""
+    layers = []
+    for i, (n_units, rate) in enumerate(zip(units, dropout)):
+        if i == 0:
+            layers.append(Dense(n_units, activation='relu', input_shape=(input_dim,)))
+        else:
+            layers.append(Dense(n_units, activation='relu'))
+        layers.append(Dropout(rate))
+    layers.append(Dense(n_classes, activation='softmax'))
+    model = Sequential(layers)
     
-    # 8. Sauvegarde des modèles
-    os.makedirs("ressources/models", exist_ok=True)
-    os.makedirs("ressources/graphiques", exist_ok=True)
+    model.compile(
+        loss='sparse_categorical_crossentropy',
+        optimizer=Adam(learning_rate=learning_rate),
+        metrics=['accuracy']
+    )
+    return model
+
+def save_artifacts(model, label_encoder, feature_columns, history, models_dir=MODELS_DIR):
+    """Sauvegarde le modèle (.h5, .npz et variantes), les encodeurs et l'historique (si fourni) dans models_dir"""
+    os.makedirs(models_dir, exist_ok=True)
     
-    model.save("ressources/models/orientation_deep_model.h5", save_format="h5")
-    joblib.dump(label_encoder, "ressources/models/nn_label_encoder.pkl")
-    joblib.dump(feature_columns, "ressources/models/nn_feature_columns.pkl")
+    model.save(os.path.join(models_dir, "orientation_deep_model.h5"), save_format="h5")
+    weights_path = os.path.join(models_dir, "orientation_deep_model.npz")
+    max_diff = export_and_verify(model, weights_path)
+    print(f"Poids NumPy exportés (écart max avec Keras: {max_diff:.2e})")
+    variant_paths = export_quantized_variants(model, weights_path)
+    joblib.dump(label_encoder, os.path.join(models_dir, "nn_label_encoder.pkl"))
+    joblib.dump(feature_columns, os.path.join(models_dir, "nn_feature_columns.pkl"))
     
     # Sauvegarder l'historique d'entraînement
-    joblib.dump(history.history, "ressources/models/training_history.pkl")
+    if history is not None:
+        joblib.dump(history.history, os.path.join(models_dir, "training_history.pkl"))
     
-    print("Modèles et courbe d'apprentissage sauvegardés avec succès!")
+    print("Modèles sauvegardés avec succès!")
+    return variant_paths
+
+def report_model_variants(X_test, y_test, variant_paths, latency_rows=200):
+    """Affiche précision, taille, temps de chargement et latence par ligne de chaque variante"""
+    from tensorflow.keras.models import load_model
+
+    print(f"\n=== VARIANTES DU MODÈLE ===")
+    print(f"{'Variante':<16} {'Accuracy':>9} {'Taille (Ko)':>12} {'Chargement (ms)':>16} {'Latence/ligne (ms)':>19}")
+    for name, path in variant_paths.items():
+        start = time.perf_counter()
+        if path.endswith(".h5"):
+            keras_model = load_model(path, compile=False)
+            predict = lambda X: keras_model(X, training=False).numpy()
+        else:
+            predict = NumpyDenseModel.load(path).predict_proba
+        load_ms = (time.perf_counter() - start) * 1000
+
+        accuracy = accuracy_score(y_test, np.argmax(predict(X_test), axis=1))
+
+        rows = X_test[:latency_rows]
+        predict(rows[:1])  # premier appel hors mesure
+        start = time.perf_counter()
+        for i in range(len(rows)):
+            predict(rows[i:i + 1])
+        latency_ms = (time.perf_counter() - start) * 1000 / max(len(rows), 1)
+
+        size_kb = os.path.getsize(path) / 1024
+        print(f"{name:<16} {accuracy:>9.4f} {size_kb:>12.1f} {load_ms:>16.1f} {latency_ms:>19.3f}")
+
+def plot_learning_curve(history, output_dir=GRAPHS_DIR, formats=("png", "pdf"), dpi=300):
+    """Génère et sauvegarde la courbe d'apprentissage, renvoie les fichiers écrits.
+
+    Le rendu passe par le canevas Agg (sans fenêtre): il ne bloque pas et
+    fonctionne sans affichage, y compris depuis le serveur.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-def plot_learning_curve(history):
-    """Génère et sauvegarde la courbe d'apprentissage"""
-    
     # Créer une figure avec deux sous-graphiques
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+    fig = Figure(figsize=(15, 5))
+    FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(1, 2)
     
     # Courbe de précision
     ax1.plot(history.history['accuracy'], label='Accuracy Entraînement', linewidth=2)
@@ -111,45 +303,75 @@ def plot_learning_curve(history):
     ax2.grid(True, alpha=0.3)
     
     # Ajuster l'espacement
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Sauvegarder le graphique
-    plt.savefig('ressources/graphiques/courbe_apprentissage.png', 
-                dpi=300, bbox_inches='tight', facecolor='white')
-    plt.savefig('ressources/graphiques/courbe_apprentissage.pdf', 
-                bbox_inches='tight', facecolor='white')
-    
-    # Afficher le graphique
-    plt.show()
-    
-    # Afficher les statistiques finales
-    final_train_acc = history.history['accuracy'][-1]
-    final_val_acc = history.history['val_accuracy'][-1]
-    final_train_loss = history.history['loss'][-1]
-    final_val_loss = history.history['val_loss'][-1]
-    
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"courbe_apprentissage.{fmt}")
+        fig.savefig(path, dpi=dpi, bbox_inches='tight', facecolor='white')
+        paths.append(path)
+    return paths
+
+def print_history_summary(history):
+    """Affiche les statistiques finales d'un historique d'entraînement"""
     print(f"\n=== STATISTIQUES FINALES D'ENTRAÎNEMENT ===")
-    print(f"Précision finale - Entraînement: {final_train_acc:.4f}")
-    print(f"Précision finale - Validation: {final_val_acc:.4f}")
-    print(f"Loss finale - Entraînement: {final_train_loss:.4f}")
-    print(f"Loss finale - Validation: {final_val_loss:.4f}")
-    print(f"Nombre d'époques effectuées: {len(history.history['accuracy'])}")
+    print(f"Précision finale - Entraînement: {history['accuracy'][-1]:.4f}")
+    print(f"Précision finale - Validation: {history['val_accuracy'][-1]:.4f}")
+    print(f"Loss finale - Entraînement: {history['loss'][-1]:.4f}")
+    print(f"Loss finale - Validation: {history['val_loss'][-1]:.4f}")
+    print(f"Nombre d'époques effectuées: {len(history['accuracy'])}")
     
     # Trouver la meilleure époque pour la validation
-    best_epoch_val = np.argmax(history.history['val_accuracy']) + 1
-    best_val_acc = np.max(history.history['val_accuracy'])
+    best_epoch_val = np.argmax(history['val_accuracy']) + 1
+    best_val_acc = np.max(history['val_accuracy'])
     print(f"Meilleure accuracy validation: {best_val_acc:.4f} (époque {best_epoch_val})")
 
-def load_and_plot_existing_history():
+def load_and_plot_existing_history(models_dir=MODELS_DIR, graphs_dir=GRAPHS_DIR):
     """Charge et affiche l'historique d'entraînement existant"""
     try:
-        history = joblib.load("ressources/models/training_history.pkl")
-        plot_learning_curve(type('History', (), {'history': history})())
+        history = joblib.load(os.path.join(models_dir, "training_history.pkl"))
+        print_history_summary(history)
+        for path in plot_learning_curve(type('History', (), {'history': history})(), output_dir=graphs_dir):
+            print(f"Courbe enregistrée: {path}")
     except FileNotFoundError:
         print("Aucun historique d'entraînement trouvé. Veuillez d'abord entraîner le modèle.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Entraîne le modèle d'orientation")
+    parser.add_argument("--stream", action="store_true", help="Lire le CSV par morceaux (gros exports)")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--chunksize", type=int, default=10000, help="Lignes lues par morceau")
+    parser.add_argument("--shuffle-buffer", type=int, default=10000, help="Taille du tampon de mélange")
+    parser.add_argument("--cache-dir", default=None, help="Dossier de cache disque des lots encodés")
+    parser.add_argument("--no-plot", action="store_true", help="Ne pas générer la courbe d'apprentissage")
+    parser.add_argument("--plot-formats", default="png,pdf", help="Formats de la courbe, séparés par des virgules")
+    parser.add_argument("--plot-dpi", type=int, default=300)
+    parser.add_argument("--no-variants", action="store_true", help="Ne pas comparer les variantes du modèle")
+    parser.add_argument("--resume", action="store_true", help="Reprendre depuis le dernier point de reprise")
+    parser.add_argument("--checkpoint-every", type=int, default=1, help="Époques entre deux points de reprise")
+    parser.add_argument("--checkpoint-dir", default=None, help="Défaut: <models-dir>/checkpoints")
+    parser.add_argument("--models-dir", default=MODELS_DIR, help="Dossier des modèles et encodeurs")
+    parser.add_argument("--graphs-dir", default=GRAPHS_DIR, help="Dossier de la courbe d'apprentissage")
+    args = parser.parse_args()
+
+    train(TrainingConfig(
+        csv_path=args.csv,
+        stream=args.stream,
+        chunksize=args.chunksize,
+        shuffle_buffer=args.shuffle_buffer,
+        cache_dir=args.cache_dir,
+        plot=not args.no_plot,
+        plot_formats=tuple(fmt.strip() for fmt in args.plot_formats.split(",") if fmt.strip()),
+        plot_dpi=args.plot_dpi,
+        compare_variants=not args.no_variants,
+        models_dir=args.models_dir,
+        graphs_dir=args.graphs_dir,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume
+    ))
     
     # Optionnel: Pour visualiser un historique existant
-    # load_and_plot_existing_history()
\ No newline at end of file
+    # load_and_plot_existing_history()
@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback, EarlyStopping
+
+def peak_rss_mb():
+    """Peak resident memory of the process in MB (None if it cannot be measured)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS, in kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        # peak_wset only exists on Windows; fall back to the current RSS elsewhere
+        return getattr(memory, "peak_wset", memory.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+class ResumableEarlyStopping(EarlyStopping):
+    """EarlyStopping whose patience counter and best weights survive a resume"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.resume_state = None
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+        if self.resume_state:
+            self.wait = self.resume_state["wait"]
+            self.best = self.resume_state["best"]
+            self.best_weights = self.resume_state.get("best_weights")
+            self.resume_state = None
+
+class TrainingCheckpoint(Callback):
+    """Save weights, optimizer state and epoch counter every ``interval`` epochs.
+
+    The TensorFlow checkpoint holds the model and optimizer variables; a
+    ``state.json`` next to it records the epoch, the history so far and the
+    early-stopping counters, and is only rewritten once the checkpoint it
+    points to is complete. ``fingerprint`` identifies the data and split, so
+    a checkpoint is never resumed against different data.
+    """
+
+    STATE_FILE = "state.json"
+    BEST_WEIGHTS_FILE = "best_weights.npz"
+
+    def __init__(self, model, directory, interval=1, fingerprint=None, early_stopping=None, max_to_keep=2):
+        super().__init__()
+        self.directory = directory
+        self.interval = max(1, int(interval))
+        self.fingerprint = fingerprint
+        self.early_stopping = early_stopping
+        self.epoch = 0
+        self.history = {}
+        self._epoch_var = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self._checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer, epoch=self._epoch_var)
+        self._manager = tf.train.CheckpointManager(self._checkpoint, directory, max_to_keep=max_to_keep)
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, self.STATE_FILE)
+
+    def restore(self):
+        """Load the last checkpoint if there is one, return the epoch to resume from (0 otherwise)"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        if state.get("fingerprint") != self.fingerprint:
+            raise ValueError(
+                f"Le point de reprise de {self.directory} correspond à d'autres données ou paramètres "
+                f"({state.get('fingerprint')} != {self.fingerprint})"
+            )
+
+        # Optimizer slots are created lazily and restored on first use
+        self._checkpoint.restore(state["checkpoint"]).expect_partial()
+        self.epoch = int(self._epoch_var.numpy())
+        self.history = state["history"]
+
+        if self.early_stopping is not None and state.get("early_stopping"):
+            resume_state = dict(state["early_stopping"])
+            best_weights_path = os.path.join(self.directory, self.BEST_WEIGHTS_FILE)
+            if os.path.exists(best_weights_path):
+                with np.load(best_weights_path) as data:
+                    resume_state["best_weights"] = [data[f"arr_{i}"] for i in range(len(data.files))]
+            self.early_stopping.resume_state = resume_state
+        return self.epoch
+
+    def on_epoch_end(self, epoch, logs=None):
+        for name, value in (logs or {}).items():
+            self.history.setdefault(name, []).append(float(value))
+        self.epoch = epoch + 1
+        if self.epoch % self.interval == 0:
+            self.save()
+
+    def save(self):
+        self._epoch_var.assign(self.epoch)
+        checkpoint_path = self._manager.save(checkpoint_number=self.epoch)
+
+        state = {
+            "epoch": self.epoch,
+            "checkpoint": checkpoint_path,
+            "fingerprint": self.fingerprint,
+            "history": self.history,
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        if self.early_stopping is not None:
+            state["early_stopping"] = {"wait": int(self.early_stopping.wait), "best": float(self.early_stopping.best)}
+            if self.early_stopping.best_weights is not None:
+                np.savez(os.path.join(self.directory, self.BEST_WEIGHTS_FILE), *self.early_stopping.best_weights)
+
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        logging.info(f"Training checkpoint saved at epoch {self.epoch}: {checkpoint_path}")
+
+    def clear(self):
+        """Remove the checkpoints once the run has completed and its artifacts are saved"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class TrainingTelemetry(Callback):
+    """Append one JSON line per epoch: wall time, samples/sec, peak RSS and the epoch metrics"""
+
+    def __init__(self, path, samples_per_epoch=None, batch_size=None, run_info=None):
+        super().__init__()
+        self.path = path
+        self.samples_per_epoch = samples_per_epoch
+        self.batch_size = batch_size
+        self.run_info = run_info or {}
+        self._epoch_start = None
+        self._batches = 0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._batches = 0
+        self._epoch_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._batches += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._epoch_start
+        # Streamed datasets have no known length: estimate from the batch count
+        samples = self.samples_per_epoch
+        if samples is None and self.batch_size:
+            samples = self._batches * self.batch_size
+
+        record = {
+            **self.run_info,
+            "epoch": epoch + 1,
+            "epoch_time_s": round(elapsed, 3),
+            "samples": samples,
+            "samples_per_s": round(samples / max(elapsed, 1e-9), 1) if samples else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **{name: float(value) for name, value in (logs or {}).items()}
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
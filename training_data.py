@@ -0,0 +1,155 @@
+import os
+import shutil
+import hashlib
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.preprocessing import LabelEncoder
+from questions import QUESTIONS
+from preprocessing import normalize_text, encode_features, PREPROCESSING_VERSION
+from answer_codec import questionnaire_schema, schema_fingerprint
+
+TARGET_COLUMN = "Champ convenable"
+DROP_COLUMNS = ["Horodateur"]
+DEFAULT_CACHE_DIR = "ressources/cache"
+
+EncodedDataset = namedtuple("EncodedDataset", ["X", "y", "feature_columns", "label_encoder", "cache_key"])
+
+def _checkbox_columns(columns, questions=QUESTIONS):
+    """Survey columns holding checkbox questions (their options are fixed by questions.QUESTIONS)"""
+    texts = {normalize_text(q["text"]) for q in questions.values() if q["type"] == "checkbox"}
+    return [column for column in columns if normalize_text(column) in texts]
+
+def split_features(df):
+    """Drop unused columns and split a survey DataFrame into (features, labels)"""
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    return df.drop(columns=[TARGET_COLUMN]), df[TARGET_COLUMN]
+
+def build_vocabulary(csv_path, chunksize=50000, questions=QUESTIONS):
+    """First pass over the CSV: fix the feature columns and label classes.
+
+    The column layout is the one ``encode_features`` gives on the full
+    dataset (multi-hot checkbox options first, then one-hot columns with
+    sorted categories), so the artifacts stay interchangeable.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    features = [c for c in header if c not in DROP_COLUMNS and c != TARGET_COLUMN]
+    checkbox = _checkbox_columns(features, questions)
+    categorical = [c for c in features if c not in checkbox]
+
+    values = {column: set() for column in categorical}
+    labels = set()
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=categorical + [TARGET_COLUMN]):
+        for column in categorical:
+            values[column].update(chunk[column].dropna().unique())
+        labels.update(chunk[TARGET_COLUMN].dropna().unique())
+
+    # Multi-hot columns, named like expand_checkbox_answers does
+    sample = pd.DataFrame({column: pd.Series(dtype=object) for column in checkbox})
+    feature_columns = encode_features(sample, questions).columns.tolist()
+    for column in categorical:
+        feature_columns.extend(f"{column}_{value}" for value in sorted(values[column]))
+
+    label_encoder = LabelEncoder()
+    label_encoder.classes_ = np.array(sorted(labels), dtype=object)
+    return feature_columns, label_encoder
+
+def encode_chunk(df, feature_columns, label_encoder):
+    """Encode one chunk of survey rows against a fixed vocabulary"""
+    df = df.dropna(subset=[TARGET_COLUMN])
+    X, y = split_features(df)
+    X_encoded = encode_features(X).reindex(columns=feature_columns, fill_value=0.0)
+    return X_encoded.values.astype(np.float32), label_encoder.transform(y).astype(np.int32)
+
+def iter_encoded_chunks(csv_path, feature_columns, label_encoder, chunksize=10000,
+                        subset=None, validation_fraction=0.2, seed=42):
+    """Yield encoded (X, y) chunks; ``subset`` ('train' / 'validation') applies a deterministic split"""
+    for index, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize)):
+        X, y = encode_chunk(chunk, feature_columns, label_encoder)
+        if subset is not None:
+            # Same seed per chunk on every epoch, so a row always lands in the same subset
+            is_validation = np.random.default_rng(seed + index).random(len(y)) < validation_fraction
+            keep = is_validation if subset == "validation" else ~is_validation
+            X, y = X[keep], y[keep]
+        if len(y):
+            yield X, y
+
+def make_dataset(csv_path, feature_columns, label_encoder, subset="train", batch_size=32,
+                 chunksize=10000, shuffle_buffer=10000, cache_path=None,
+                 validation_fraction=0.2, seed=42):
+    """tf.data pipeline streaming the CSV chunk by chunk (shuffle buffer, optional disk cache, prefetch)"""
+    import tensorflow as tf
+
+    n_features = len(feature_columns)
+    dataset = tf.data.Dataset.from_generator(
+        lambda: iter_encoded_chunks(
+            csv_path, feature_columns, label_encoder, chunksize,
+            subset, validation_fraction, seed
+        ),
+        output_signature=(
+            tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int32)
+        )
+    ).unbatch()
+
+    if cache_path:
+        # Encoded rows are written to disk on the first epoch and replayed afterwards
+        dataset = dataset.cache(cache_path)
+    if shuffle_buffer and subset == "train":
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def dataset_cache_key(csv_path):
+    """Content hash of the CSV combined with the preprocessing version and the questionnaire
+    (the checkbox option lists of questions.QUESTIONS decide the multi-hot columns)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return f"{digest.hexdigest()}_v{PREPROCESSING_VERSION}_q{schema_fingerprint(questionnaire_schema(QUESTIONS))}"
+
+def load_encoded_dataset(csv_path="ressources/data/dataset_orientation.csv", cache_dir=DEFAULT_CACHE_DIR, mmap=True):
+    """Encoded (X, y, feature_columns, label_encoder) for a survey CSV, cached on disk.
+
+    The first run encodes the CSV and writes ``X.npy`` / ``y.npy`` plus the
+    vocabulary under a folder named after the cache key; later runs on the
+    same file memory-map the arrays instead of re-encoding.
+    """
+    cache_key = dataset_cache_key(csv_path)
+    folder = os.path.join(cache_dir, cache_key)
+    mmap_mode = 'r' if mmap else None
+
+    if not os.path.exists(os.path.join(folder, "meta.pkl")):
+        df = pd.read_csv(csv_path)
+        df = df.dropna(subset=[TARGET_COLUMN])
+        X, y = split_features(df)
+
+        label_encoder = LabelEncoder()
+        y_encoded = label_encoder.fit_transform(y).astype(np.int32)
+        X_encoded = encode_features(X)
+
+        # Written to a temporary folder first so an interrupted run never leaves a partial cache
+        tmp_folder = f"{folder}.tmp{os.getpid()}"
+        os.makedirs(tmp_folder, exist_ok=True)
+        np.save(os.path.join(tmp_folder, "X.npy"), np.ascontiguousarray(X_encoded.values, dtype=np.float32))
+        np.save(os.path.join(tmp_folder, "y.npy"), y_encoded)
+        joblib.dump({
+            "feature_columns": X_encoded.columns.tolist(),
+            "label_encoder": label_encoder,
+            "source": os.path.abspath(csv_path)
+        }, os.path.join(tmp_folder, "meta.pkl"))
+        try:
+            os.replace(tmp_folder, folder)
+        except OSError:
+            # Another process finished first: keep its copy
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+
+    meta = joblib.load(os.path.join(folder, "meta.pkl"))
+    return EncodedDataset(
+        np.load(os.path.join(folder, "X.npy"), mmap_mode=mmap_mode),
+        np.load(os.path.join(folder, "y.npy"), mmap_mode=mmap_mode),
+        meta["feature_columns"],
+        meta["label_encoder"],
+        cache_key
+    )
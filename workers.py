@@ -0,0 +1,143 @@
+import logging
+import threading
+from datetime import datetime
+import requests
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from models import model_registry
+
+SUBMIT_URL = "http://127.0.0.1:5000/api/submit"
+
+class SubmissionCancelled(Exception):
+    """Raised inside the worker when the submission was cancelled"""
+
+class SubmissionSignals(QObject):
+    """Signals emitted by SubmissionWorker back to the GUI thread"""
+    progress = pyqtSignal(int, str)          # percentage, stage label
+    prediction_ready = pyqtSignal(str, float)  # domaine, confidence
+    finished = pyqtSignal(dict)              # final status of the submission
+    failed = pyqtSignal(str)                 # unexpected error message
+
+class SubmissionWorker(QRunnable):
+    """Encode → predict → submit → persist a questionnaire off the Qt main thread.
+
+    The answers are collected on the GUI thread (they are read from widgets)
+    and handed over as a plain dict. The final ``finished`` payload carries a
+    ``status`` the interface turns into a message:
+    ``demo``, ``submitted``, ``save_failed``, ``invalid_student``,
+    ``student_not_found``, ``network_error`` or ``backup_failed``.
+    """
+
+    def __init__(self, db, student_id, full_name, class_name, answers,
+                 submit_url=SUBMIT_URL, model_timeout=60):
+        super().__init__()
+        self.db = db
+        self.student_id = student_id
+        self.full_name = full_name
+        self.class_name = class_name
+        self.answers = answers
+        self.submit_url = submit_url
+        self.model_timeout = model_timeout
+        self.signals = SubmissionSignals()
+        self.model_version = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop at the next stage boundary and emit nothing more"""
+        self._cancelled.set()
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise SubmissionCancelled()
+
+    def _emit(self, signal, *args):
+        if not self._cancelled.is_set():
+            signal.emit(*args)
+
+    def run(self):
+        try:
+            self._emit(self.signals.progress, 10, "Chargement du modèle")
+            if not model_registry.wait_until_ready(0):
+                model_registry.preload()
+            if not model_registry.wait_until_ready(self.model_timeout):
+                raise TimeoutError("Le modèle d'analyse n'a pas pu être chargé à temps")
+            model_loader = model_registry.get()
+            self.model_version = model_loader.model_version
+            self._check_cancelled()
+
+            if model_loader.use_demo_mode:
+                self._emit(self.signals.finished, {"status": "demo"})
+                return
+
+            self._emit(self.signals.progress, 50, "Analyse")
+            # Même chemin que le serveur: encodage + cache des prédictions
+            class_ids, labels, probabilities = model_loader.predict_batch([self.answers])
+            domaine = str(labels[0])
+            confidence = float(probabilities[0][class_ids[0]] * 100)
+            self._emit(self.signals.prediction_ready, domaine, confidence)
+            self._check_cancelled()
+
+            self._emit(self.signals.progress, 70, "Envoi au serveur")
+            result = self._submit(domaine, confidence)
+            result.update({"domaine": domaine, "confidence": confidence})
+            self._emit(self.signals.finished, result)
+
+        except SubmissionCancelled:
+            logging.info(f"Submission cancelled for student: {self.student_id}")
+        except Exception as e:
+            logging.error(f"Erreur traitement réponses: {str(e)}")
+            self._emit(self.signals.failed, str(e))
+
+    def _submit(self, domaine, confidence):
+        """Send the result to the server, then persist it; falls back to a local backup"""
+        # Vérification locale avant envoi
+        if not self.db.get_student_info(self.student_id):
+            return self._save_locally(domaine, confidence, "invalid_student")
+
+        payload = {
+            "student_id": self.student_id,
+            "full_name": self.full_name,
+            "class_name": self.class_name,
+            "domaine": domaine,
+            "confidence": confidence,
+            "model_version": self.model_version,
+            "answers": self.answers
+        }
+
+        try:
+            response = requests.post(self.submit_url, json=payload, timeout=5)
+
+            # Gestion spécifique du 404
+            if response.status_code == 404:
+                error = response.json().get('error', '')
+                return self._save_locally(domaine, confidence, "student_not_found", error)
+
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            return self._save_locally(domaine, confidence, "network_error", str(e))
+
+        # Sauvegarde dans la base de données locale (même si l'interface a été fermée)
+        self._emit(self.signals.progress, 90, "Enregistrement")
+        success = self.db.save_student_responses(self.student_id, {
+            "domaine": domaine,
+            "confidence": confidence,
+            "submission_date": datetime.now().isoformat(),
+            "model_version": self.model_version,
+            "answers": self.answers
+        })
+        return {"status": "submitted" if success else "save_failed"}
+
+    def _save_locally(self, domaine, confidence, status, message=""):
+        """Sauvegarde de secours locale"""
+        self._emit(self.signals.progress, 90, "Sauvegarde locale")
+        success = self.db.save_student_responses(self.student_id, {
+            "domaine": domaine,
+            "confidence": confidence,
+            "submission_date": datetime.now().isoformat(),
+            "model_version": self.model_version,
+            "local_backup": True  # Marqueur pour sauvegarde locale
+        })
+        return {"status": status if success else "backup_failed", "message": message}